@@ -0,0 +1,59 @@
+"""
+Query latency of the offline search index (pyanimecli index build / -s --offline).
+
+Builds an index of synthetic titles in a temporary cache directory, then times
+exact, misspelled, partial and multi-word queries, and reports whether the
+intended title ranks first. No network is used.
+
+    python benchmarks/bench_catalog.py [titles]
+"""
+import os, sys, time, random, tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp()
+from pyanimecli import catalog
+
+WORDS = ("blade northern sky starfall academy lantern keeper harbor town diaries crimson tide paper kites "
+         "moonlit garden iron saint winter wolf silver tower hollow crown ember knight ocean song").split()
+SYLLABLES = ("ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho "
+             "ma mi mu me mo ra ri ru re ro ya yu yo wa n ga gi gu ge go").split()
+QUERIES = [  # (query, title expected first)
+    ("lantern keeper harbor", "Lantern Keeper Harbor"),
+    ("lanturn keper harbr", "Lantern Keeper Harbor"),
+    ("lantern kee", "Lantern Keeper"),
+    ("crimson tide paper kites", "Crimson Tide Paper Kites"),
+    ("silvr towr", "Silver Tower"),
+]
+
+
+def synthetic_titles(count, seed=0):
+    """Titles of 1-5 words from a few thousand romanized words plus the English WORDS."""
+    rng = random.Random(seed)
+    vocabulary = list({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(4000)}) + WORDS * 5
+    titles = {expected for _, expected in QUERIES}
+    while len(titles) < count:
+        titles.add(" ".join(rng.choice(vocabulary).capitalize() for _ in range(rng.randint(1, 5))))
+    return [{"id": f"anime-{i}", "title": title, "type": "TV", "sub": 12, "dub": 0} for i, title in enumerate(sorted(titles))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    items = synthetic_titles(count)
+    start = time.perf_counter()
+    db = catalog.connect(create=True)
+    catalog.store(db, catalog.merge({}, items, "action"))
+    db.close()
+    print(f"indexed {len(items)} titles in {time.perf_counter() - start:.2f}s ({os.path.getsize(catalog.index_path()) / 1e6:.1f} MB)")
+
+    print(f"\n{'query':<28} {'ms/query':>9}  first result")
+    for query, expected in QUERIES:
+        runs, start = 20, time.perf_counter()
+        for _ in range(runs):
+            results = catalog.search(query)
+        elapsed = (time.perf_counter() - start) / runs * 1000
+        first = results[0]["title"] if results else "-"
+        print(f"{query:<28} {elapsed:>9.2f}  {first}{'' if first == expected else f'  (expected {expected})'}")
+
+
+if __name__ == "__main__":
+    main()
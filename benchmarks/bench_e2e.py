@@ -0,0 +1,94 @@
+"""
+End-to-end benchmark of real CLI commands against the local stub server.
+
+Runs `-s`, `-i`, `-d` (one episode and a three-episode range) and `-w` as
+subprocesses with PYANIMECLI_BASE_URL and PYANIMECLI_PROXY_URL pointed at
+stub_server, and reports wall time, requests and bytes moved per command.
+`-w` needs ffmpeg and ffplay and is skipped without them. `download-lp`
+downloads through the local proxy (-lp) with its segment cache kept between
+runs, so after the first run the median shows a replay served locally.
+
+    python benchmarks/bench_e2e.py [--runs 3] [--latency 50] [--bandwidth 4096] [--error-rate 0.05]
+"""
+import os, sys, time, shutil, argparse, tempfile, statistics, subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+import stub_server
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ANIME_ID = "blade-of-the-northern-sky-1000"
+
+
+def commands(output_dir):
+    return {
+        "search": ["-s", "northern", "sky"],
+        "info": ["-i", ANIME_ID],
+        "download": ["-d", ANIME_ID, "1", "sub", os.path.join(output_dir, "episode.mp4")],
+        "download-range": ["-d", ANIME_ID, "1-3", "sub", os.path.join(output_dir, "range"), "-pd", "2"],
+        "download-lp": ["-d", ANIME_ID, "1", "sub", os.path.join(output_dir, "episode.mp4"), "-lp"],
+        "watch": ["-w", ANIME_ID, "1", "sub"],
+    }
+
+
+def run_command(args, env, server, output_dir):
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    server.stats.reset()
+    start = time.perf_counter()
+    result = subprocess.run(
+        # The local proxy's segment cache is what -lp is measured on, so keep caches for it.
+        [sys.executable, "-m", "pyanimecli", *args, *([] if "-lp" in args else ["--no-cache"])],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=600,
+    )
+    return time.perf_counter() - start, result, server.stats.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end CLI benchmark against the stub server.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per command; the median is reported.")
+    parser.add_argument("--only", default="", help="Comma-separated commands to run (search,info,download,download-range,download-lp,watch).")
+    parser.add_argument("-v", dest="verbose", action="store_true", help="Print the CLI output of the last run.")
+    stub_server.config_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = stub_server.start(config=stub_server.config_from(args))
+    scratch = tempfile.mkdtemp(prefix="pyanimecli-e2e-")
+    output_dir = os.path.join(scratch, "out")
+    env = dict(
+        os.environ,
+        PYANIMECLI_BASE_URL=url,
+        PYANIMECLI_PROXY_URL=f"{url}/cors?url=",
+        PYANIMECLI_PYPI_URL=f"{url}/pypi",
+        XDG_CACHE_HOME=os.path.join(scratch, "cache"),
+        COLUMNS="120",
+        LINES="40",
+    )
+    selected = [name for name in args.only.split(",") if name] or list(commands(output_dir))
+    can_watch = shutil.which("ffmpeg") and shutil.which("ffplay")
+
+    print(f"stub: {url}  latency {args.latency:g} ms  bandwidth {args.bandwidth:g} KiB/s  errors {args.error_rate:.0%}\n")
+    print(f"{'command':<16} {'wall s':>8} {'requests':>9} {'errors':>7} {'MiB':>8} {'MiB/s':>7}  breakdown")
+    failed = False
+    try:
+        for name in selected:
+            if name == "watch" and not can_watch:
+                print(f"{name:<16} skipped: ffmpeg and ffplay are required")
+                continue
+            runs = [run_command(commands(output_dir)[name], env, server, output_dir) for _ in range(args.runs)]
+            wall = statistics.median(run[0] for run in runs)
+            _, result, stats = runs[-1]
+            mib = stats["total_bytes"] / 2**20
+            breakdown = ", ".join(f"{kind} {count}" for kind, count in sorted(stats["requests"].items()))
+            status = "" if result.returncode == 0 else f"  (exit {result.returncode})"
+            failed |= result.returncode != 0
+            print(f"{name:<16} {wall:>8.2f} {stats['total_requests']:>9} {stats['errors']:>7} {mib:>8.2f} {mib / wall:>7.2f}  {breakdown}{status}")
+            if args.verbose:
+                print(result.stdout[-2000:], result.stderr[-2000:])
+    finally:
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
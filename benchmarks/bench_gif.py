@@ -0,0 +1,111 @@
+"""
+Time to first frame and peak memory for animated image playback.
+
+Generates synthetic GIFs of increasing length and plays each once, in a fresh
+process, with tui.AnimationPlayer and with the previous approach (copy every
+frame, resize all, pre-render all, then display). Output goes to /dev/null.
+
+    python benchmarks/bench_gif.py [frame counts...]
+"""
+import os, sys, time, shutil, resource, tempfile, subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from pyanimecli.tui import AnimationPlayer, FrameEncoder
+
+SOURCE_SIZE = (480, 270)
+TERMINAL_SIZE = (120, 80)
+FRAME_DURATION_MS = 20
+
+
+def make_gif(path, count):
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (SOURCE_SIZE[1], SOURCE_SIZE[0], 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = np.roll(background, i * 4, axis=1)
+        frames.append(Image.fromarray(frame).quantize(64))
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=FRAME_DURATION_MS, loop=0)
+
+
+def legacy_play(img):
+    frames = []
+    while True:
+        try:
+            frames.append(img.copy())
+            img.seek(img.tell() + 1)
+        except EOFError:
+            break
+    frames = [frame.resize(TERMINAL_SIZE).convert("RGB") for frame in frames]
+    encoder = FrameEncoder()
+    return [encoder.encode(frame) for frame in frames]
+
+
+class FirstWrite:
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = None
+
+    def write(self, text):
+        if self.first is None:
+            self.first = time.perf_counter()
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def peak_rss_mib():
+    # ru_maxrss survives fork+exec on Linux, so a child would report the parent's
+    # peak; VmHWM is per address space.
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def child(method, path):
+    from PIL import Image
+    img = Image.open(path)
+    out = FirstWrite(open(os.devnull, "w", encoding="utf-8"))
+    start = time.perf_counter()
+    if method == "legacy":
+        rendered = legacy_play(img)
+        out.write(rendered[0])
+    else:
+        real, sys.stdout = sys.stdout, out
+        try:
+            AnimationPlayer(img, TERMINAL_SIZE).play(loops=1)
+        finally:
+            sys.stdout = real
+    print(f"{(out.first - start) * 1000:.0f} {peak_rss_mib():.0f}")
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [50, 200, 600]
+    scratch = tempfile.mkdtemp()
+    print(f"{'frames':>7} {'method':<8} {'first frame ms':>15} {'peak RSS MiB':>13}")
+    try:
+        for count in counts:
+            path = os.path.join(scratch, f"{count}.gif")
+            make_gif(path, count)
+            for method in ("legacy", "streamed"):
+                result = subprocess.run([sys.executable, __file__, "--child", method, path], capture_output=True, text=True, check=True)
+                first, peak = result.stdout.split()
+                print(f"{count:>7} {method:<8} {first:>15} {peak:>13}")
+            os.remove(path)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
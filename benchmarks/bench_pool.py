@@ -0,0 +1,53 @@
+"""
+Throughput of RenderPool against in-process encoding.
+
+Encodes a run of large-terminal frames (what ffmpeg hands over after scaling a
+1080p source) with 0 (in-process), 1, 2, 4 ... worker processes and prints
+frames per second for each.
+
+    python benchmarks/bench_pool.py [max_workers]
+"""
+import os, sys, time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from pyanimecli.pool import RenderPool
+from pyanimecli.tui import FrameEncoder
+
+WIDTH, HEIGHT, COUNT = 400, 120, 120
+
+
+def source_frames(seed=0):
+    """Detailed, fully changing frames so every frame costs a near-full encode."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (HEIGHT * 2, WIDTH, 3), dtype=np.uint8)
+    return [np.roll(base, i, axis=1) for i in range(COUNT)]
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    frames = source_frames()
+
+    encoder = FrameEncoder()
+    start = time.perf_counter()
+    for frame in frames:
+        encoder.encode(frame)
+    baseline = COUNT / (time.perf_counter() - start)
+    print(f"{WIDTH}x{HEIGHT}, {COUNT} frames, {os.cpu_count()} cores")
+    print(f"{'workers':>7} {'fps':>8} {'scaling':>8}")
+    print(f"{'0':>7} {baseline:>8.1f} {1.0:>7.2f}x")
+
+    workers = 1
+    while workers <= max_workers:
+        with RenderPool(workers) as pool:
+            list(pool.encode(enumerate(frames[:workers * 2])))  # start and warm the workers
+            start = time.perf_counter()
+            for _ in pool.encode(enumerate(frames)):
+                pass
+            fps = COUNT / (time.perf_counter() - start)
+        print(f"{workers:>7} {fps:>8.1f} {fps / baseline:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Frames-per-second benchmark for tui.render_frame.
+
+Renders synthetic frames at common terminal sizes, checks the output against the
+original per-pixel encoder and prints throughput for both, then reports the bytes
+per frame FrameEncoder saves on a mostly static sequence, bytes per frame in
+the 256- and 16-color modes against truecolor, and the per-frame cost of the
+subtitle overlay as the cue count grows.
+
+    python benchmarks/bench_render.py
+"""
+import os, sys, time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from pyanimecli.tui import RGB_to_ANSI, FrameEncoder, render_frame
+from pyanimecli.subtitles import SubtitleIndex, SubtitleOverlay
+
+SIZES = [(80, 24), (200, 60), (400, 120)]
+
+
+def legacy_render_frame(frame):
+    """The original pixel-by-pixel encoder, kept as the reference output."""
+    data = np.asarray(frame, dtype=np.uint8)
+    output_lines = ["\033[H"]
+    for top_row, bottom_row in zip(data[0::2], data[1::2]):
+        line_chars = []
+        previous_ansi = None
+        for (r, g, b), (br, bg, bb) in zip(top_row, bottom_row):
+            ansi = RGB_to_ANSI(int(r), int(g), int(b), int(br), int(bg), int(bb))
+            if ansi == previous_ansi:
+                line_chars[-1] += "▀"
+            else:
+                line_chars.append(ansi + "▀")
+                previous_ansi = ansi
+        output_lines.append("".join(line_chars))
+    output_lines.append("\033[0m")
+    return "\n".join(output_lines)
+
+
+def synthetic_frame(width, height, scene="cel", seed=0):
+    """
+    Builds a (height*2, width, 3) test frame.
+    - `cel`: flat fills with banded shading, roughly like an anime cel
+    - `noise`: per-pixel gradients plus noise, the encoder's worst case
+    """
+    rng = np.random.default_rng(seed)
+    rows = height * 2
+    frame = np.zeros((rows, width, 3), dtype=np.uint8)
+    if scene == "cel":
+        frame[:, :] = (90, 140, 200)
+        frame[:, :, 2] = (np.linspace(160, 240, rows) // 16 * 16).astype(np.uint8)[:, None]
+        frame[rows // 2:, :] = (70, 120, 60)
+        frame[rows // 4:rows * 3 // 4, width // 3:width // 2] = (230, 180, 160)
+        frame[rows // 3:rows // 2, width // 3 + 2:width // 2 - 2] = (40, 30, 30)
+    else:
+        frame[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)
+        frame[:, :, 1] = np.linspace(0, 255, rows, dtype=np.uint8)[:, None]
+        noisy = rng.random((rows, width)) < 0.1
+        frame[noisy] = rng.integers(0, 256, (int(noisy.sum()), 3), dtype=np.uint8)
+    return frame
+
+
+def measure(render, frame, min_time=1.0):
+    count, start = 0, time.perf_counter()
+    while True:
+        render(frame)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count / elapsed
+
+
+def moving_sequence(width, height, count=30):
+    """Cel frames with a small character sliding across a static background."""
+    background = synthetic_frame(width, height, "cel")
+    rows, size = height * 2, max(2, width // 10)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        x = (i * 2) % max(1, width - size)
+        frame[rows // 2:rows // 2 + size, x:x + size] = (200, 60, 60)
+        frames.append(frame)
+    return frames
+
+
+def delta_report():
+    print(f"\n{'size':>9} {'full B/frame':>13} {'delta B/frame':>14} {'saved':>6} {'delta fps':>10}")
+    for width, height in SIZES:
+        frames = moving_sequence(width, height)
+        full = sum(len(render_frame(frame).encode()) for frame in frames) / len(frames)
+        encoder = FrameEncoder()
+        start = time.perf_counter()
+        delta = sum(len(encoder.encode(frame).encode()) for frame in frames) / len(frames)
+        fps = len(frames) / (time.perf_counter() - start)
+        print(f"{width:>4}x{height:<4} {full:>13.0f} {delta:>14.0f} {1 - delta / full:>6.0%} {fps:>10.1f}")
+
+
+def color_mode_report(width=200, height=60):
+    print(f"\n{'mode':<13} {'scene':<6} {'full B/frame':>13} {'vs truecolor':>13} {'delta B/frame':>14} {'fps':>7}")
+    frames = moving_sequence(width, height)  # cel frames, so the delta column is for cel only
+    for scene in ("cel", "noise"):
+        frame = synthetic_frame(width, height, scene)
+        truecolor = len(render_frame(frame).encode())
+        for mode, dither in (("truecolor", False), ("256", False), ("256", True), ("16", False), ("16", True)):
+            full = len(render_frame(frame, mode, dither).encode())
+            delta = "-"
+            if scene == "cel":
+                encoder = FrameEncoder(mode, dither)
+                delta = f"{sum(len(encoder.encode(f).encode()) for f in frames) / len(frames):.0f}"
+            fps = measure(lambda f: render_frame(f, mode, dither), frame, min_time=0.3)
+            label = mode + (" +dither" if dither else "")
+            print(f"{label:<13} {scene:<6} {full:>13} {full / truecolor - 1:>+13.0%} {delta:>14} {fps:>7.1f}")
+
+
+def subtitle_report(width=200, height=60, fps=24, seconds=600):
+    """Overlay cost per presented frame over `seconds` of playback, against a scan of every cue."""
+    print(f"\n{'cues':>6} {'overlay us/frame':>17} {'linear scan us/frame':>21}")
+    keys = FrameEncoder().pack(synthetic_frame(width, height))
+    for count in (10, 1000, 10000):
+        # One two-second cue every 2.5 s, spread over the file's whole length.
+        cues = [(i * 2.5, i * 2.5 + 2.0, [f"Line {i} of the subtitle track", "and its second line"]) for i in range(count)]
+        overlay = SubtitleOverlay(SubtitleIndex(cues), width, height)
+        times = [i / fps + (count * 2.5 - seconds) / 2 for i in range(seconds * fps)]
+        start = time.perf_counter()
+        for t in times:
+            overlay.update(t, keys, True)
+        indexed = (time.perf_counter() - start) / len(times) * 1e6
+        start = time.perf_counter()
+        for t in times[::10]:
+            [lines for begin, end, lines in cues if begin <= t < end]
+        linear = (time.perf_counter() - start) / len(times[::10]) * 1e6
+        print(f"{count:>6} {indexed:>17.2f} {linear:>21.2f}")
+
+
+def main():
+    print(f"{'scene':<6} {'size':>9} {'legacy fps':>11} {'numpy fps':>10} {'speedup':>8}  identical")
+    for scene in ("cel", "noise"):
+        for width, height in SIZES:
+            frame = synthetic_frame(width, height, scene)
+            identical = legacy_render_frame(frame) == render_frame(frame)
+            legacy = measure(legacy_render_frame, frame)
+            fast = measure(render_frame, frame)
+            print(f"{scene:<6} {width:>4}x{height:<4} {legacy:>11.1f} {fast:>10.1f} {fast / legacy:>7.1f}x  {identical}")
+    delta_report()
+    color_mode_report()
+    subtitle_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+CLI startup benchmark.
+
+Reports `python -X importtime` for the CLI module and wall-clock time for
+`-h`, `-v` and `-g` (with tables and with --json) run against the local stub
+API, and exits non-zero if a module that should load lazily is imported at
+startup, or if rich is imported by a --json run.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os, sys, re, time, tempfile, subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+import stub_server
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+LAZY_MODULES = ["requests", "urllib3", "numpy", "PIL", "rich", "concurrent.futures"]
+COMMANDS = [["-h"], ["-v"], ["-g", "--no-cache"], ["-g", "--no-cache", "--json"]]
+JSON_COMMAND = ["-i", "blade-of-the-northern-sky-1000", "--no-cache", "--json"]
+
+
+def imported_modules(args, env):
+    """Top-level package names `python -X importtime` reports for a CLI run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "pyanimecli", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return {match.group(1).split(".")[0] for match in re.finditer(r"import time:.*\|\s+(\S+)$", result.stderr, re.M)}
+
+
+def import_times():
+    """Returns {module: (self_us, cumulative_us)} for importing the CLI module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pyanimecli.pyanimecli"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def wall_time(args, env, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "pyanimecli", *args], cwd=ROOT, env=env, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    times = import_times()
+    total = times.get("pyanimecli.pyanimecli", (0, 0))[1]
+    print(f"import pyanimecli.pyanimecli: {total / 1000:.1f} ms cumulative")
+    for module, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:8]:
+        print(f"  {self_us / 1000:6.1f} ms  {module}")
+
+    server, url = stub_server.start()
+    env = dict(os.environ, PYANIMECLI_BASE_URL=url, PYANIMECLI_PYPI_URL=f"{url}/pypi", XDG_CACHE_HOME=tempfile.mkdtemp())
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, "-c", "pass"], capture_output=True, check=True)
+    interpreter = (time.perf_counter() - start) / runs
+    print(f"\nwall clock over {runs} runs (bare interpreter: {interpreter * 1000:.0f} ms)")
+    for args in COMMANDS:
+        best, mean = wall_time(args, env, runs)
+        print(f"  {' '.join(args):<24} min {best * 1000:6.0f} ms   mean {mean * 1000:6.0f} ms")
+    json_rich = "rich" in imported_modules(JSON_COMMAND, env)
+    server.shutdown()
+
+    eager = [module for module in LAZY_MODULES if module in times]
+    if eager:
+        print(f"\nFAIL: imported at startup but should load lazily: {', '.join(eager)}")
+        sys.exit(1)
+    if json_rich:
+        print(f"\nFAIL: rich is imported by {' '.join(JSON_COMMAND)}")
+        sys.exit(1)
+    print("\nOK: no lazily loaded module is imported at startup, and --json runs never import rich.")
+
+
+if __name__ == "__main__":
+    main()
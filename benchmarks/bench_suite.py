@@ -0,0 +1,244 @@
+"""
+Micro-benchmarks for the rendering and display hot paths, checked against stored baselines.
+
+Covers tui.render_frame on synthetic frames at several terminal sizes (plus the
+256- and 16-color modes at 200x60), and clean_description,
+display_search_results and display_anime_info on synthetic API payloads (up to
+5,000 episodes). Each case reports calls per second, output bytes and peak
+traced memory. Everything runs offline; display output goes to
+an in-memory 120-column truecolor console.
+
+    python benchmarks/bench_suite.py                 # compare with baselines.json
+    python benchmarks/bench_suite.py --save          # record new baselines
+    python benchmarks/bench_suite.py -k anime_info   # only matching cases
+
+Exits 1 when a case is slower, or produces more bytes or peak memory, than its
+baseline by more than --threshold (default 40%). Throughput is compared relative
+to a reference workload of the same kind (pure Python for the display cases,
+NumPy for render_frame), so a faster or slower machine shifts both alike. Each
+case is timed in --rounds rounds, each right after a short timing of its
+reference, and the median of the per-round ratios is compared, so a busy moment
+during the run moves one round rather than the result. On a shared single-core
+host, unchanged code stays within about 25% of its baseline run to run, hence
+the default threshold; the "spread" column shows how far the rounds of the
+current run disagree. Baselines recorded without a relative speed only have
+bytes and memory checked.
+"""
+import os, io, sys, json, time, argparse, statistics, tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from rich.console import Console
+from pyanimecli import pyanimecli as cli
+from pyanimecli.tui import render_frame
+from bench_render import synthetic_frame
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+FRAME_SIZES = [(80, 24), (120, 40), (200, 60), (400, 120)]
+DESCRIPTION_SIZES = [200, 2_000, 20_000]
+RESULT_COUNTS = [10, 100, 1_000]
+EPISODE_COUNTS = [10, 100, 1_000, 5_000]
+REFERENCE_TIME = 0.1  # seconds timing the reference workload before each round
+
+
+def capture_console():
+    """Points the CLI's console at a buffer and returns the buffer."""
+    buffer = io.StringIO()
+    cli.console = Console(file=buffer, width=120, force_terminal=True, color_system="truecolor")
+    return buffer
+
+
+def description(length):
+    sentence = "A young swordsman sets out across a ruined continent to find the truth about his family. "
+    text = (sentence * (length // len(sentence) + 1))[:length]
+    return text + "\r\n\r\n[Written by MAL Rewrite]"
+
+
+def search_payload(count):
+    return {
+        "current_page": 1,
+        "total_pages": 1,
+        "results": [
+            {"id": f"synthetic-anime-{i}", "title": f"Synthetic Anime Title {i}", "type": "TV", "sub": i % 24, "dub": i % 12, "duration": "24m"}
+            for i in range(count)
+        ],
+    }
+
+
+def info_payload(episodes):
+    return {
+        "id": "synthetic-anime-1",
+        "title": "Synthetic Anime",
+        "type": "TV",
+        "total_episodes": episodes,
+        "sub": episodes,
+        "dub": episodes // 2,
+        "status": "Ongoing",
+        "genres": ["Action", "Adventure", "Fantasy"],
+        "image": "https://example.com/cover.jpg",
+        "description": description(1_000),
+        "episodes": [
+            {"number": n, "title": f"Episode {n}: The Long Road, Part {n % 7 + 1}", "id": f"synthetic-anime-1$episode${100000 + n}"}
+            for n in range(1, episodes + 1)
+        ],
+    }
+
+
+def display_case(display, payload):
+    def run():
+        buffer = capture_console()
+        display(payload)
+        return buffer.getvalue()
+    return run
+
+
+def cases():
+    """Yields (name, kind, callable); each callable returns the output it produced, and kind names its reference."""
+    for scene in ("cel", "noise"):
+        for width, height in FRAME_SIZES:
+            frame = synthetic_frame(width, height, scene)
+            yield f"render_frame/{scene}/{width}x{height}", "numpy", lambda frame=frame: render_frame(frame)
+        frame = synthetic_frame(200, 60, scene)
+        for mode in ("256", "16"):
+            yield f"render_frame/{scene}/200x60/{mode}", "numpy", lambda frame=frame, mode=mode: render_frame(frame, mode)
+    for length in DESCRIPTION_SIZES:
+        text = description(length)
+        yield f"clean_description/{length}", "python", lambda text=text: cli.clean_description(text)
+    for count in RESULT_COUNTS:
+        yield f"display_search_results/{count}", "python", display_case(cli.display_search_results, search_payload(count))
+    for count in EPISODE_COUNTS:
+        yield f"display_anime_info/{count}", "python", display_case(cli.display_anime_info, info_payload(count))
+
+
+def python_workload():
+    """Fixed pure-Python work (sorting, dict churn, string formatting), the reference for the display cases."""
+    data = sorted((i * 7919) % 10007 for i in range(5_000))
+    table = {}
+    for value in data:
+        table[f"k{value}"] = table.get(f"k{value % 97}", 0) + value
+    return "".join(f"{key}={value};" for key, value in table.items())
+
+
+REFERENCE_PIXELS = (np.arange(120 * 200 * 3, dtype=np.uint64) * 2654435761 % 251).reshape(120, 200, 3)
+REFERENCE_CODES = np.array([f"{i};" for i in range(256)], dtype=object)
+
+
+def numpy_workload():
+    """Fixed NumPy work shaped like render_frame (packing, unique, object-array joins), the reference for its cases."""
+    keys = (REFERENCE_PIXELS[..., 0] << 16) | (REFERENCE_PIXELS[..., 1] << 8) | REFERENCE_PIXELS[..., 2]
+    changes = np.empty(keys.shape, dtype=bool)
+    changes[:, 0] = True
+    np.not_equal(keys[:, 1:], keys[:, :-1], out=changes[:, 1:])
+    _, index = np.unique(keys[changes], return_inverse=True)
+    return "".join(REFERENCE_CODES[(index & 0xFF).astype(np.intp)].tolist())
+
+
+REFERENCES = {"python": python_workload, "numpy": numpy_workload}
+
+
+def rate(run, min_time):
+    """Calls per second over at least one call and `min_time` seconds."""
+    calls, start = 0, time.perf_counter()
+    while not calls or time.perf_counter() - start < min_time:
+        run()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def measure(run, reference, rounds, min_time):
+    """
+    Returns the case's median calls per second, its reference's, their median
+    per-round ratio and its spread (largest minus smallest, over the median),
+    output bytes and peak KiB.
+    """
+    output = run()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    speeds, references, ratios = [], [], []
+    for _ in range(rounds):
+        references.append(rate(reference, REFERENCE_TIME))
+        speeds.append(rate(run, min_time))
+        ratios.append(speeds[-1] / references[-1])
+    relative = statistics.median(ratios)
+    return {
+        "ops_per_s": round(statistics.median(speeds), 2),
+        "reference_ops_per_s": round(statistics.median(references), 2),
+        "relative": round(relative, 6),
+        "spread": round((max(ratios) - min(ratios)) / relative, 3),
+        "bytes": len(output.encode()),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def relative_change(result, baseline):
+    """Change in throughput relative to the reference against `baseline`; None when the baseline has no relative speed."""
+    if not baseline.get("relative"):
+        return None
+    return result["relative"] / baseline["relative"] - 1
+
+
+def regressions(result, baseline, threshold):
+    """Lists how `result` is worse than `baseline` beyond the threshold."""
+    problems = []
+    change = relative_change(result, baseline)
+    if change is not None and change < -threshold:
+        problems.append(f"throughput {change:+.0%}")
+    for metric in ("bytes", "peak_kib"):
+        if result[metric] > baseline[metric] * (1 + threshold):
+            problems.append(f"{metric} {result[metric] / baseline[metric] - 1:+.0%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path micro-benchmarks.")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baselines.")
+    parser.add_argument("--threshold", type=float, default=0.40, help="Allowed regression as a fraction (default 0.40).")
+    parser.add_argument("--rounds", type=int, default=5, help="Timing rounds per case; the median is compared (default 5).")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each case per round (at least one call).")
+    parser.add_argument("-k", dest="pattern", default="", help="Only run cases whose name contains this text.")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    results = {}
+    for name, kind, run in cases():
+        if args.pattern in name:
+            results[name] = measure(run, REFERENCES[kind], args.rounds, args.min_time)
+
+    failed = 0
+    print(f"{'case':<34} {'ops/s':>10} {'ref ops/s':>10} {'spread':>7} {'bytes':>10} {'peak KiB':>10}  vs baseline")
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            verdict = "new"
+        else:
+            problems = regressions(result, baseline, args.threshold)
+            failed += bool(problems)
+            change = relative_change(result, baseline)
+            speed = "no reference, ops/s not compared" if change is None else f"{change:+.0%} ops/s relative"
+            verdict = f"REGRESSED: {', '.join(problems)}" if problems else f"ok ({speed})"
+        print(
+            f"{name:<34} {result['ops_per_s']:>10.1f} {result['reference_ops_per_s']:>10.1f} {result['spread']:>7.0%}"
+            f" {result['bytes']:>10} {result['peak_kib']:>10.1f}  {verdict}"
+        )
+
+    if args.save:
+        baselines.update({name: {key: value for key, value in result.items() if key != "spread"} for name, result in results.items()})
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        print(f"\nSaved {len(results)} baselines to {BASELINES}")
+    elif failed:
+        print(f"\n{failed} case(s) regressed by more than {args.threshold:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Local stand-in for the anime API and the HLS proxy, so the CLI can be measured offline.
+
+Replays the recorded responses in benchmarks/fixtures/ for search, listings,
+info, watch and schedule, and serves a synthetic HLS stream: a master playlist
+with 360p/720p/1080p variants, media playlists, generated MPEG-TS segments and a
+WebVTT subtitle track, plus generated cover images under /images/. `/cors?url=<url>` behaves like the proxy for URLs on the
+stub itself. Latency, bandwidth and error rate can be injected, and `/__stats`
+reports request counts and bytes sent.
+
+    python benchmarks/stub_server.py [--port 8000] [--latency 50] [--bandwidth 4096] [--error-rate 0.05]
+
+Then run the CLI with
+    PYANIMECLI_BASE_URL=http://127.0.0.1:<port>
+    PYANIMECLI_PROXY_URL=http://127.0.0.1:<port>/cors?url=
+"""
+import os, json, time, random, shutil, argparse, threading, subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+VARIANTS = [(1080, 1920, 5_000_000), (720, 1280, 2_800_000), (360, 640, 800_000)]
+NULL_PACKET = b"\x47\x1f\xff\x10" + b"\xff" * 184  # MPEG-TS null packet (PID 0x1FFF)
+SUBTITLES = "WEBVTT\n\n00:00:00.500 --> 00:00:02.000\nWhere does this road lead?\n\n00:00:02.500 --> 00:00:04.000\nNorth. Always north.\n"
+SUGGESTION_LIMIT = 5  # search-suggestions answers are cut off here
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, bandwidth=None, error_rate=0.0, segments=6, segment_duration=2.0, seed=0):
+        self.latency = latency            # seconds added before every response
+        self.bandwidth = bandwidth        # bytes per second per connection, None for unthrottled
+        self.error_rate = error_rate      # chance that a request gets a 503
+        self.segments = segments
+        self.segment_duration = segment_duration
+        self.random = random.Random(seed)
+
+
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests, self.bytes, self.errors = {}, {}, 0
+
+    def record(self, kind, sent, error=False):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.bytes[kind] = self.bytes.get(kind, 0) + sent
+            self.errors += error
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "bytes": dict(self.bytes),
+                "errors": self.errors,
+                "total_requests": sum(self.requests.values()),
+                "total_bytes": sum(self.bytes.values()),
+            }
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json"), encoding="utf-8") as f:
+        return f.read()
+
+
+def synthetic_segment(height, width, bandwidth, duration):
+    """
+    A playable MPEG-TS test pattern when ffmpeg is installed; otherwise null
+    packets sized to the variant's bitrate, which still exercise transfer and
+    concatenation.
+    """
+    if shutil.which("ffmpeg"):
+        cmd = [
+            "ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=24",
+            "-f", "lavfi", "-i", "sine=frequency=440", "-t", str(duration),
+            "-c:v", "mpeg2video", "-b:v", str(bandwidth), "-c:a", "mp2", "-f", "mpegts", "pipe:1",
+        ]
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    packets = max(1, int(bandwidth * duration / 8) // len(NULL_PACKET))
+    return NULL_PACKET * packets
+
+
+def synthetic_cover(name, width=150, height=225):
+    """A binary PPM gradient whose colors depend on `name`, so every cover differs."""
+    seed = sum(name.encode()) % 256
+    pixels = bytearray()
+    for y in range(height):
+        for x in range(width):
+            pixels += bytes(((x * 255 // width + seed) % 256, y * 255 // height, (seed * 3 + (x ^ y)) % 256))
+    return f"P6 {width} {height} 255\n".encode() + bytes(pixels)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path, query = url.path, parse_qs(url.query)
+        if path == "/cors":
+            # The real proxy takes the upstream URL unencoded after "url=".
+            target = urlsplit(unquote(url.query.partition("url=")[2]))
+            path, query = target.path, parse_qs(target.query)
+        routed = self.server.route(path, query, f"http://{self.headers.get('Host')}")
+        if routed is None:
+            self.reply("other", 404, b"not found", "text/plain")
+            return
+        kind, body, content_type = routed
+        if kind not in ("stats",) and self.server.inject_error():
+            self.reply(kind, 503, b"injected error", "text/plain", error=True)
+            return
+        self.reply(kind, 200, body, content_type)
+
+    def reply(self, kind, status, body, content_type, error=False):
+        config = self.server.config
+        if config.latency:
+            time.sleep(config.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        sent = 0
+        try:
+            if config.bandwidth:
+                chunk = max(1024, int(config.bandwidth / 20))
+                for start in range(0, len(body), chunk):
+                    part = body[start:start + chunk]
+                    self.wfile.write(part)
+                    sent += len(part)
+                    time.sleep(len(part) / config.bandwidth)
+            else:
+                self.wfile.write(body)
+                sent = len(body)
+        finally:
+            if kind != "stats":
+                self.server.stats.record(kind, sent, error)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, StubHandler)
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self._segments = {}
+        self._segments_lock = threading.Lock()
+
+    def inject_error(self):
+        return self.config.error_rate and self.config.random.random() < self.config.error_rate
+
+    def segment(self, height):
+        with self._segments_lock:
+            if height not in self._segments:
+                _, width, bandwidth = next(v for v in VARIANTS if v[0] == height)
+                self._segments[height] = synthetic_segment(height, width, bandwidth, self.config.segment_duration)
+            return self._segments[height]
+
+    def route(self, path, query, origin):
+        """Returns (kind, body, content type) for a path, or None for a 404."""
+        parts = path.strip("/").split("/")
+        head = parts[0]
+        if head == "__stats":
+            return "stats", json.dumps(self.stats.snapshot()).encode(), "application/json"
+        if head == "hls":
+            return self.route_hls(parts[1:])
+        if head == "images" and len(parts) == 2:
+            return "image", synthetic_cover(parts[1]), "image/x-portable-pixmap"
+        if head == "subs":
+            return "subtitle", SUBTITLES.encode(), "text/vtt"
+        if head == "pypi":
+            return "api", json.dumps({"info": {"version": "1.0.8"}}).encode(), "application/json"
+        if head == "search-suggestions" and len(parts) == 2:
+            # Substring matches on title or alias, cut off at SUGGESTION_LIMIT like the real endpoint.
+            words = unquote(parts[1]).lower().split()
+            items = json.loads(load_fixture("suggestions").replace("{origin}", origin))
+            items = [item for item in items if all(w in f"{item['title']} {item['other_data']['alias']}".lower() for w in words)]
+            return "api", json.dumps(items[:SUGGESTION_LIMIT]).encode(), "application/json"
+        if path == "/genre/list":
+            return "api", json.dumps(["action", "adventure", "comedy", "drama", "fantasy", "romance"]).encode(), "application/json"
+
+        fixture = {"search": "search", "recent-episodes": "search", "top-airing": "search", "genre": "search",
+                   "studio": "search", "info": "info", "watch": "watch", "schedule": "schedule"}.get(head)
+        if fixture is None:
+            return None
+        data = json.loads(load_fixture(fixture).replace("{origin}", origin))
+        if fixture == "search":
+            page = int(query.get("page", ["1"])[0])
+            data["current_page"] = page
+            data["has_next_page"] = page < data["total_pages"]
+            data["results"] = [dict(item, id=f"{item['id']}-p{page}") for item in data["results"]]
+        return "api", json.dumps(data).encode(), "application/json"
+
+    def route_hls(self, parts):
+        config = self.config
+        if parts == ["master.m3u8"]:
+            lines = ["#EXTM3U"]
+            for height, width, bandwidth in VARIANTS:
+                lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}")
+                lines.append(f"{height}p/index.m3u8")
+            return "playlist", ("\n".join(lines) + "\n").encode(), "application/vnd.apple.mpegurl"
+        if len(parts) != 2 or not parts[0].endswith("p") or not parts[0][:-1].isdigit():
+            return None
+        height = int(parts[0][:-1])
+        if height not in [v[0] for v in VARIANTS]:
+            return None
+        if parts[1] == "index.m3u8":
+            lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{int(config.segment_duration + 0.999)}", "#EXT-X-MEDIA-SEQUENCE:0"]
+            for index in range(config.segments):
+                lines += [f"#EXTINF:{config.segment_duration:.3f},", f"seg_{index:04d}.ts"]
+            lines.append("#EXT-X-ENDLIST")
+            return "playlist", ("\n".join(lines) + "\n").encode(), "application/vnd.apple.mpegurl"
+        if parts[1].startswith("seg_") and parts[1].endswith(".ts"):
+            index = parts[1][4:-3]
+            if index.isdigit() and int(index) < config.segments:
+                return "segment", self.segment(height), "video/mp2t"
+        return None
+
+
+def start(port=0, config=None):
+    """Starts the stub on a background thread. Returns (server, base_url)."""
+    server = StubServer(("127.0.0.1", port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def config_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0, help="Milliseconds added to every response.")
+    parser.add_argument("--bandwidth", type=float, default=0, help="KiB/s per connection (0 = unthrottled).")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--segments", type=int, default=6, help="Segments per media playlist.")
+    parser.add_argument("--segment-duration", type=float, default=2.0, help="Seconds per segment.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for error injection.")
+
+
+def config_from(args):
+    return StubConfig(
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1024 or None,
+        error_rate=args.error_rate,
+        segments=args.segments,
+        segment_duration=args.segment_duration,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the anime API and HLS proxy.")
+    parser.add_argument("--port", type=int, default=8000)
+    config_arguments(parser)
+    args = parser.parse_args()
+    server, url = start(args.port, config_from(args))
+    print(f"Stub API listening on {url}")
+    print(f"  PYANIMECLI_BASE_URL={url} PYANIMECLI_PROXY_URL={url}/cors?url=")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,8 +1,5 @@
-from .pyanimecli import main
+from .pyanimecli import main, console
 import sys
-from rich.console import Console
-
-console = Console()
 
 if __name__ == "__main__":
     try:
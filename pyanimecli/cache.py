@@ -0,0 +1,195 @@
+import os, sys, json, time, hashlib, datetime, threading
+from collections import OrderedDict
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+MEMORY_ENTRIES = 256
+EVICT_TARGET = 0.9  # a full directory is trimmed to this share of its limit, so the next writes don't scan again
+
+# Seconds a response stays fresh, by endpoint prefix (first match wins).
+# None means never cache; "day" means fresh until the next local midnight.
+CACHE_TTLS = [
+    ("watch", None),
+    ("genre/list", 7 * DAY),
+    ("info/", DAY),
+    ("recent-episodes", 10 * MINUTE),
+    ("top-airing", 30 * MINUTE),
+    ("schedule/", "day"),
+    ("spotlight", HOUR),
+    ("search-suggestions/", DAY),
+    ("search/", HOUR),
+    ("genre/", 6 * HOUR),
+    ("studio/", 6 * HOUR),
+]
+
+enabled = True   # --no-cache turns reads and writes off
+refresh = False  # --refresh skips reads but still stores fresh responses
+
+_memory = None  # OrderedDict of recently used entries by path, once keep_in_memory() is called
+_memory_size = MEMORY_ENTRIES
+_memory_lock = threading.Lock()
+_sizes = {}  # directory -> running estimate of its bytes on disk, seeded by a scan
+_sizes_lock = threading.Lock()
+
+
+def cache_root():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "pyanimecli")
+
+
+def cache_dir():
+    return os.path.join(cache_root(), "responses")
+
+
+def cache_ttl(endpoint):
+    for prefix, ttl in CACHE_TTLS:
+        if endpoint.startswith(prefix):
+            if ttl == "day":
+                now = datetime.datetime.now()
+                midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+                return (midnight - now).total_seconds()
+            return ttl
+    return HOUR
+
+
+def _path(endpoint, params):
+    key = json.dumps([endpoint, params or {}], sort_keys=True, default=str)
+    return os.path.join(cache_dir(), hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def load(endpoint, params=None):
+    """
+    Returns the cached entry for a request as a dict with "data", "stored" and
+    "expires", or None. Expired entries are returned too; check "expires".
+    """
+    if not enabled or cache_ttl(endpoint) is None:
+        return None
+    path = _path(endpoint, params)
+    if _memory is not None:
+        with _memory_lock:
+            entry = _memory.get(path)
+            if entry is not None:
+                _memory.move_to_end(path)
+                return entry
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)  # mtime doubles as the last-used time for LRU eviction
+    except (OSError, ValueError):
+        return None
+    _remember(path, entry)
+    return entry
+
+
+def is_fresh(entry):
+    return entry is not None and time.time() < entry["expires"]
+
+
+def store(endpoint, params, data):
+    ttl = cache_ttl(endpoint)
+    if not enabled or ttl is None:
+        return
+    path = _path(endpoint, params)
+    now = time.time()
+    entry = {"endpoint": endpoint, "params": params, "stored": now, "expires": now + ttl, "data": data}
+    _remember(path, entry)
+    try:
+        body = json.dumps(entry).encode()
+        write_atomic(path, body)
+        written(len(body))
+    except OSError:
+        pass
+
+
+def keep_in_memory(entries=MEMORY_ENTRIES):
+    """
+    Also keeps the `entries` most recently used responses in memory, so a
+    long-lived process (the shell) skips the disk read and JSON decode.
+    """
+    global _memory, _memory_size
+    with _memory_lock:
+        _memory = OrderedDict() if _memory is None else _memory
+        _memory_size = entries
+
+
+def _remember(path, entry):
+    if _memory is None:
+        return
+    with _memory_lock:
+        _memory[path] = entry
+        _memory.move_to_end(path)
+        while len(_memory) > _memory_size:
+            _memory.popitem(last=False)
+
+
+def write_atomic(path, data):
+    """Writes bytes to `path` through a temporary file, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def evict(max_bytes=MAX_CACHE_BYTES, directory=None, target=None):
+    """
+    Deletes least recently used files once `directory` (the response cache by
+    default) exceeds `max_bytes`, until it fits in `target` (`max_bytes` by
+    default). Files removed by someone else meanwhile are skipped. Returns the
+    bytes left.
+    """
+    directory = directory or cache_dir()
+    target = max_bytes if target is None else target
+    stats = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    if entry.is_file():
+                        info = entry.stat()
+                        stats.append((info.st_mtime, info.st_size, entry.path))
+                except OSError:
+                    pass  # removed since the scan listed it
+    except OSError:
+        return 0
+    total = sum(size for _, size, _ in stats)
+    if total <= max_bytes:
+        return total
+    for _, size, path in sorted(stats):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        total -= size
+    return total
+
+
+def written(size, max_bytes=MAX_CACHE_BYTES, directory=None):
+    """
+    Records `size` bytes just written to `directory` (the response cache by
+    default) and evicts once its estimated size crosses `max_bytes`. The
+    estimate starts from a scan and then adds up writes, so a write usually
+    costs no scan at all; a full directory is trimmed to EVICT_TARGET of its
+    limit. Overwrites count as growth, which only makes the next scan come
+    sooner.
+    """
+    directory = directory or cache_dir()
+    with _sizes_lock:
+        estimate = _sizes.get(directory)
+        if estimate is not None:
+            estimate = _sizes[directory] = estimate + size
+    if estimate is None or estimate > max_bytes:
+        remaining = evict(max_bytes, directory, int(max_bytes * EVICT_TARGET))
+        with _sizes_lock:
+            _sizes[directory] = remaining
@@ -0,0 +1,254 @@
+import os, re, json, time, sqlite3, threading
+
+from . import cache, http_client, profiler
+
+CRAWL_WORKERS = 4
+CRAWL_RATE = 4.0  # requests per second across all workers, to stay polite to the API
+MAX_PAGES = 500  # per listing, in case a listing never reports its last page
+CANDIDATES = 100  # full-text matches re-ranked by trigram similarity per query
+MIN_SQLITE = (3, 34, 0)  # first release with the FTS5 trigram tokenizer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anime (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, alias TEXT, genres TEXT, type TEXT,
+    sub INTEGER, dub INTEGER, duration TEXT, image TEXT, updated REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS anime_fts USING fts5(title, alias, tokenize='trigram');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class CatalogError(Exception):
+    pass
+
+
+def index_path():
+    return os.path.join(cache.cache_root(), "catalog.sqlite3")
+
+
+def connect(create=False):
+    """Opens the index, or returns None when it has not been built and `create` is false."""
+    path = index_path()
+    if not create and not os.path.exists(path):
+        return None
+    required = ".".join(map(str, MIN_SQLITE))
+    if sqlite3.sqlite_version_info < MIN_SQLITE:
+        raise CatalogError(f"The offline index needs SQLite {required} or newer; this Python has {sqlite3.sqlite_version}.")
+    if create:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path)
+    if create:
+        try:
+            db.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            db.close()
+            raise CatalogError(f"The offline index needs SQLite {required} or newer built with FTS5 ({e}).") from e
+    return db
+
+
+def words(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def padded(text):
+    """Each word as "  word ", the way trigram similarity pads words, so word starts and ends count."""
+    return " ".join(f"  {word} " for word in words(text))
+
+
+def trigrams(text):
+    grams = set()
+    for word in words(text):
+        word = f"  {word} "
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(slot - now)
+
+
+def fetch(base_url, endpoint, page, limiter):
+    """One listing page, or None on any error."""
+    import requests
+    limiter.wait()
+    try:
+        with profiler.span("catalog.fetch", "api", endpoint=endpoint, page=page):
+            response = http_client.get(f"{base_url}/{endpoint}", params={"page": page} if page else None)
+            response.raise_for_status()
+            return response.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+
+def unchanged(row, item):
+    return row is not None and row["title"] == item.get("title") and row["sub"] == item.get("sub") and row["dub"] == item.get("dub")
+
+
+def crawl_listing(base_url, endpoint, limiter, known=None):
+    """
+    Fetches a listing's pages in order. With `known` ({id: row}), stops after
+    the first page on which nothing is new or changed. Returns (items, pages
+    fetched, whether a page failed).
+    """
+    items, page = [], 1
+    while page <= MAX_PAGES:
+        data = fetch(base_url, endpoint, page, limiter)
+        if data is None:
+            return items, page - 1, True
+        results = data.get("results") or []
+        items.extend(results)
+        more = data.get("has_next_page", page < int(data.get("total_pages") or 0))
+        if not results or not more:
+            break
+        if known is not None and all(unchanged(known.get(item.get("id")), item) for item in results):
+            break
+        page += 1
+    return items, page, False
+
+
+def load_rows(db):
+    columns = ("id", "title", "alias", "genres", "type", "sub", "dub", "duration", "image")
+    return {row[0]: dict(zip(columns, row)) for row in db.execute(f"SELECT {', '.join(columns)} FROM anime")}
+
+
+def merge(rows, items, genre=None):
+    """Folds listing items into `rows`; returns the rows that changed."""
+    changed = {}
+    for item in items:
+        anime_id = item.get("id")
+        if not anime_id or not item.get("title"):
+            continue
+        row = rows.get(anime_id) or {"id": anime_id, "genres": ""}
+        genres = set(filter(None, row["genres"].split(",")))
+        if genre:
+            genres.add(genre)
+        alias = item.get("alias") or item.get("japanese_title") or (item.get("other_data") or {}).get("alias")
+        updated = dict(
+            row, title=item["title"], alias=alias or row.get("alias"), genres=",".join(sorted(genres)),
+            type=item.get("type", row.get("type")), sub=item.get("sub", row.get("sub")), dub=item.get("dub", row.get("dub")),
+            duration=item.get("duration", row.get("duration")), image=item.get("image", row.get("image")),
+        )
+        if updated != rows.get(anime_id):
+            rows[anime_id] = changed[anime_id] = updated
+    return changed
+
+
+def store(db, changed):
+    now = time.time()
+    with db:
+        for row in changed.values():
+            db.execute(
+                "INSERT INTO anime (id, title, alias, genres, type, sub, dub, duration, image, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, alias = excluded.alias, genres = excluded.genres, type = excluded.type, "
+                "sub = excluded.sub, dub = excluded.dub, duration = excluded.duration, image = excluded.image, updated = excluded.updated",
+                (row["id"], row["title"], row["alias"], row["genres"], row["type"], row["sub"], row["dub"], row["duration"], row["image"], now),
+            )
+            (rowid,) = db.execute("SELECT rowid FROM anime WHERE id = ?", (row["id"],)).fetchone()
+            db.execute("DELETE FROM anime_fts WHERE rowid = ?", (rowid,))
+            db.execute("INSERT INTO anime_fts (rowid, title, alias) VALUES (?, ?, ?)", (rowid, padded(row["title"]), padded(row["alias"])))
+
+
+def crawl(base_url, studios=(), update=False, progress=None):
+    """
+    Builds the index from genre/<g>, top-airing, recent-episodes and studio/<id>
+    listings, CRAWL_WORKERS listings at a time and at most CRAWL_RATE requests
+    per second. A build walks every page; an update (`update`) walks each
+    listing only until a page brings nothing new, and re-crawls the studios
+    given to earlier builds. `progress(pages, titles)` is called as listings
+    finish. Returns {"pages", "titles", "changed", "failed", "seconds"}.
+    Raises CatalogError when SQLite is too old for the index.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    start = time.monotonic()
+    db = connect(create=True)
+    try:
+        rows = load_rows(db)
+        stored = db.execute("SELECT value FROM meta WHERE key = 'studios'").fetchone()
+        studios = sorted(set(studios) | set(json.loads(stored[0]) if stored else []))
+        limiter = RateLimiter(CRAWL_RATE)
+        genre_list = fetch(base_url, "genre/list", None, limiter) or []
+        listings = {"top-airing": None, "recent-episodes": None}
+        listings.update({f"genre/{genre}": genre for genre in genre_list if isinstance(genre, str)})
+        listings.update({f"studio/{studio}": None for studio in studios})
+        known = dict(rows) if update else None
+
+        pages, changed, failed = 1, set(), [] if genre_list else ["genre/list"]
+        with ThreadPoolExecutor(max_workers=CRAWL_WORKERS) as pool:
+            futures = {pool.submit(crawl_listing, base_url, endpoint, limiter, known): endpoint for endpoint in listings}
+            for future in as_completed(futures):
+                endpoint = futures[future]
+                items, fetched, error = future.result()
+                pages += fetched
+                if error:
+                    failed.append(endpoint)
+                updated = merge(rows, items, listings[endpoint])
+                store(db, updated)
+                changed.update(updated)
+                if progress:
+                    progress(pages, len(rows))
+
+        with db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('studios', ?)", (json.dumps(studios),))
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('crawled', ?)", (str(time.time()),))
+    finally:
+        db.close()
+    return {"pages": pages, "titles": len(rows), "changed": len(changed), "failed": failed, "seconds": round(time.monotonic() - start, 2)}
+
+
+def search(query, limit=20):
+    """
+    Ranked, typo-tolerant matches for `query` as listing items, or None when
+    there is no index. Raises CatalogError when SQLite is too old for it. The trigram full-text index picks CANDIDATES titles or
+    aliases sharing the most trigrams with the query, and those are ranked by
+    the share of the query's (padded) trigrams they contain, then by overall
+    trigram similarity. Word-initial "  x" trigrams only take part in the
+    ranking: they match so many titles that ranking every match would dominate
+    the query time.
+    """
+    db = connect()
+    if db is None:
+        return None
+    query_grams = trigrams(query)
+    if not query_grams:
+        db.close()
+        return []
+    selective = [gram for gram in query_grams if not gram.startswith("  ")] or query_grams
+    expression = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in sorted(selective))
+    try:
+        with profiler.span("catalog.search", "api"):
+            candidates = db.execute(
+                "SELECT a.id, a.title, a.alias, a.genres, a.type, a.sub, a.dub, a.duration, a.image "
+                "FROM anime_fts JOIN anime a ON a.rowid = anime_fts.rowid WHERE anime_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, CANDIDATES),
+            ).fetchall()
+    finally:
+        db.close()
+
+    def score(candidate):
+        best = (0.0, 0.0)
+        for text in candidate[1:3]:
+            grams = trigrams(text)
+            if grams:
+                shared = len(query_grams & grams)
+                best = max(best, (shared / len(query_grams), shared / len(query_grams | grams)))
+        return best
+
+    ranked = sorted(candidates, key=score, reverse=True)[:limit]
+    return [
+        {"id": anime_id, "title": title, "alias": alias, "genres": genres.split(",") if genres else [],
+         "type": kind, "sub": sub, "dub": dub, "duration": duration, "image": image}
+        for anime_id, title, alias, genres, kind, sub, dub, duration, image in ranked
+    ]
@@ -0,0 +1,312 @@
+import os, re, json, time, shutil, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, unquote, urlsplit, urlunsplit
+
+from . import http_client
+
+SEGMENT_WORKERS = 8
+CHUNK_SIZE = 256 * 1024
+PREFETCH_CHUNK = 32 * 1024  # small reads keep a rate-capped prefetch smooth
+# ffmpeg/ffplay input options for a local playlist (see prefetch) whose entries mix files and URLs.
+LOCAL_PLAYLIST_OPTIONS = ["-protocol_whitelist", "file,http,https,tcp,tls,crypto,data", "-allowed_extensions", "ALL"]
+
+ATTRIBUTE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HLSError(Exception):
+    pass
+
+
+def parse_attributes(line):
+    return {key: value.strip('"') for key, value in ATTRIBUTE.findall(line.split(":", 1)[1])}
+
+
+class Playlist:
+    """
+    One fetched playlist. URIs inside it are resolved against the upstream URL and
+    re-wrapped with the proxy prefix, whether or not the proxy already rewrote them.
+    """
+
+    def __init__(self, url, proxy_prefix="", timeout=None):
+        self.proxy_prefix = proxy_prefix
+        self.url = self.wrap(url)
+        self.upstream = self.unwrap(url)
+        response = http_client.get(self.url, timeout=timeout)
+        response.raise_for_status()
+        self.text = response.text
+        if not self.text.lstrip().startswith("#EXTM3U"):
+            raise HLSError(f"Not an HLS playlist: {self.url}")
+
+    def wrap(self, url):
+        if not self.proxy_prefix or url.startswith(self.proxy_prefix):
+            return url
+        return self.proxy_prefix + url
+
+    def unwrap(self, url):
+        if self.proxy_prefix and url.startswith(self.proxy_prefix):
+            return unquote(url[len(self.proxy_prefix):])
+        return url
+
+    def resolve(self, uri):
+        return self.wrap(urljoin(self.upstream, self.unwrap(uri)))
+
+    @property
+    def is_master(self):
+        return "#EXT-X-STREAM-INF" in self.text
+
+    def variants(self):
+        """Returns the master playlist's variants as dicts, best bandwidth first."""
+        variants, pending = [], None
+        for line in self.text.splitlines():
+            line = line.strip()
+            if line.startswith("#EXT-X-STREAM-INF"):
+                pending = parse_attributes(line)
+            elif line and not line.startswith("#") and pending is not None:
+                width, _, height = pending.get("RESOLUTION", "").partition("x")
+                variants.append({
+                    "url": self.resolve(line),
+                    "bandwidth": int(pending.get("BANDWIDTH", 0) or 0),
+                    "resolution": pending.get("RESOLUTION", ""),
+                    "height": int(height) if height.isdigit() else 0,
+                    "name": pending.get("NAME", ""),
+                })
+                pending = None
+        return sorted(variants, key=lambda v: (v["height"], v["bandwidth"]), reverse=True)
+
+    def segments(self):
+        """
+        Returns the media playlist as a list of entries in order. Each entry is a
+        dict with "kind" of "segment", "map" (fMP4 init section) or "key"
+        (AES-128 key), its resolved "url", and the playlist "lines" it came from.
+        """
+        entries, pending = [], []
+        for line in self.text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#EXT-X-KEY") or line.startswith("#EXT-X-MAP"):
+                attributes = parse_attributes(line)
+                kind = "key" if line.startswith("#EXT-X-KEY") else "map"
+                uri = attributes.get("URI")
+                entries.append({"kind": kind, "url": self.resolve(uri) if uri else None, "lines": [line], "uri": uri})
+            elif line.startswith("#"):
+                if not line.startswith("#EXTM3U") and not line.startswith("#EXT-X-ENDLIST"):
+                    pending.append(line)
+            else:
+                entries.append({"kind": "segment", "url": self.resolve(line), "lines": pending + [line], "uri": line})
+                pending = []
+        return entries
+
+
+def select_variant(variants, quality="best"):
+    """
+    Picks a variant by `quality`: "best", "worst", a height such as "720" or
+    "720p", a resolution such as "1280x720", or a 1-based index such as "#2".
+    Heights fall back to the tallest variant not above them, else the smallest.
+    """
+    if not variants:
+        return None
+    quality = str(quality).lower().strip()
+    if quality == "best":
+        return variants[0]
+    if quality == "worst":
+        return variants[-1]
+    if "x" in quality:
+        return next((v for v in variants if v["resolution"].lower() == quality), None)
+    if quality.startswith("#") and quality[1:].isdigit():
+        index = int(quality[1:]) - 1
+        return variants[index] if 0 <= index < len(variants) else None
+    height = quality.rstrip("p")
+    if height.isdigit():
+        height = int(height)
+        return next((v for v in variants if v["height"] <= height), variants[-1])
+    return None
+
+
+class SegmentDownloader:
+    """
+    Downloads a media playlist's segments into a work directory with a bounded
+    pool of threads, then joins them into `output_path`. Finished entries are
+    appended to a journal, so a rerun for the same output skips them.
+    """
+
+    def __init__(self, playlist, output_path, workers=SEGMENT_WORKERS, progress=None):
+        self.playlist = playlist
+        self.output_path = output_path
+        self.workers = workers
+        self.progress = progress  # called as progress(done, total, bytes_downloaded)
+        self.work_dir = output_path + ".part"
+        self.journal_path = os.path.join(self.work_dir, "journal.log")
+        self.entries = playlist.segments()
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+
+    def _file(self, index):
+        kind = self.entries[index]["kind"]
+        extension = {"segment": "ts", "map": "mp4", "key": "key"}[kind]
+        return os.path.join(self.work_dir, f"{kind}_{index:05d}.{extension}")
+
+    def _load_journal(self):
+        manifest_path = os.path.join(self.work_dir, "manifest.json")
+        # Stream URLs carry expiring tokens, so the variant is identified by its
+        # playlist's upstream URL without the query, plus the entry layout.
+        manifest = {"variant": urlunsplit(urlsplit(self.playlist.upstream)[:3] + ("", "")),
+                    "kinds": [entry["kind"] for entry in self.entries]}
+        done = set()
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = {}
+            if previous == manifest and os.path.exists(self.journal_path):
+                with open(self.journal_path, encoding="utf-8") as f:
+                    done = {int(line) for line in f if line.strip().isdigit()}
+                done = {index for index in done if index < len(self.entries) and os.path.exists(self._file(index))}
+            else:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        return done
+
+    def _fetch(self, index):
+        path = self._file(index)
+        tmp_path = path + ".tmp"
+        response = http_client.get(self.entries[index]["url"], stream=True)
+        response.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                with self._lock:
+                    self.bytes_downloaded += len(chunk)
+        os.replace(tmp_path, path)
+        return index
+
+    def download(self):
+        """Fetches every missing entry. Returns the number fetched in this run."""
+        done = self._load_journal()
+        wanted = [index for index, entry in enumerate(self.entries) if entry["url"]]
+        todo = [index for index in wanted if index not in done]
+        total = len(wanted)
+        if self.progress:
+            self.progress(len(done), total, 0)
+        with open(self.journal_path, "a", encoding="utf-8") as journal, ThreadPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(self._fetch, index) for index in todo]
+            errors = []
+            try:
+                for future in as_completed(futures):
+                    try:
+                        index = future.result()
+                    except Exception as e:
+                        # Keep journaling the segments that do finish, so a rerun resumes after them.
+                        errors.append(e)
+                        continue
+                    journal.write(f"{index}\n")
+                    journal.flush()
+                    done.add(index)
+                    if self.progress:
+                        self.progress(len(done), total, self.bytes_downloaded)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        if errors:
+            raise errors[0]
+        return len(todo)
+
+    def _local_playlist(self):
+        lines = ["#EXTM3U"]
+        for index, entry in enumerate(self.entries):
+            local = os.path.basename(self._file(index))
+            if entry["kind"] == "segment":
+                lines.extend(entry["lines"][:-1])
+                lines.append(local)
+            elif entry["uri"]:
+                lines.append(entry["lines"][0].replace(entry["uri"], local))
+            else:
+                lines.append(entry["lines"][0])  # e.g. "#EXT-X-KEY:METHOD=NONE"
+        lines.append("#EXT-X-ENDLIST")
+        path = os.path.join(self.work_dir, "local.m3u8")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def assemble(self):
+        """
+        Remuxes the downloaded entries into `output_path` with ffmpeg, which also
+        handles AES-128 keys and fMP4 init sections. Without ffmpeg, plain MPEG-TS
+        segments are concatenated on disk instead. The work directory is removed
+        afterwards.
+        """
+        needs_ffmpeg = any(entry["kind"] != "segment" and entry["uri"] for entry in self.entries)
+        if shutil.which("ffmpeg"):
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "error", "-allowed_extensions", "ALL",
+                "-protocol_whitelist", "file,crypto,data", "-i", self._local_playlist(),
+                "-c", "copy", self.output_path,
+            ]
+            subprocess.run(cmd, check=True)
+        elif needs_ffmpeg:
+            raise HLSError("ffmpeg is required to assemble encrypted or fMP4 streams.")
+        else:
+            with open(self.output_path, "wb") as output:
+                for index, entry in enumerate(self.entries):
+                    if entry["kind"] != "segment":
+                        continue
+                    with open(self._file(index), "rb") as segment:
+                        shutil.copyfileobj(segment, output, CHUNK_SIZE)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def prefetch(playlist, directory, count, max_rate=None, stop=None):
+    """
+    Downloads the first `count` segments of a media playlist into `directory`,
+    averaging at most `max_rate` bytes per second, and writes a playlist there
+    that plays those segments from disk and the rest from their URLs. If `stop`
+    (a threading.Event) is set meanwhile, the playlist covers the segments that
+    had fully arrived. Returns the playlist's path, or None if none had.
+    Open the playlist with LOCAL_PLAYLIST_OPTIONS.
+    """
+    stop = stop or threading.Event()
+    entries = playlist.segments()
+    local, fetched, started = {}, 0, time.monotonic()
+    for index, entry in enumerate(entries):
+        if len(local) >= count or stop.is_set():
+            break
+        if entry["kind"] != "segment":
+            continue
+        path = os.path.join(directory, f"segment_{index:05d}.ts")
+        response = http_client.get(entry["url"], stream=True)
+        response.raise_for_status()
+        complete = True
+        with response, open(path + ".tmp", "wb") as f:
+            for chunk in response.iter_content(PREFETCH_CHUNK):
+                f.write(chunk)
+                fetched += len(chunk)
+                ahead = fetched / max_rate - (time.monotonic() - started) if max_rate else 0
+                if stop.wait(max(ahead, 0)):
+                    complete = False
+                    break
+        if not complete:
+            os.remove(path + ".tmp")  # cut off mid-segment
+            break
+        os.replace(path + ".tmp", path)
+        local[index] = path
+    if not local:
+        return None
+
+    lines = ["#EXTM3U"]
+    for index, entry in enumerate(entries):
+        if entry["kind"] == "segment":
+            lines.extend(entry["lines"][:-1])
+            lines.append(local.get(index, entry["url"]))
+        elif entry["uri"]:
+            lines.append(entry["lines"][0].replace(entry["uri"], entry["url"]))
+        else:
+            lines.append(entry["lines"][0])
+    lines.append("#EXT-X-ENDLIST")
+    path = os.path.join(directory, "prefetched.m3u8")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
@@ -0,0 +1,113 @@
+import threading
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+POOL_SIZE = 32  # parallel episode downloads each run SEGMENT_WORKERS threads against one proxy host
+
+_session = None
+_session_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_stats = {"requests": 0, "coalesced": 0, "retries": 0}
+_stats_lock = threading.Lock()  # page, episode and probe workers all count concurrently
+
+
+def configure(connect_timeout=None, read_timeout=None):
+    global CONNECT_TIMEOUT, READ_TIMEOUT
+    if connect_timeout is not None:
+        CONNECT_TIMEOUT = connect_timeout
+    if read_timeout is not None:
+        READ_TIMEOUT = read_timeout
+
+
+def get_session():
+    """
+    Returns the process-wide session: keep-alive connections pooled per host, and
+    GETs retried with exponential backoff (0.5s, 1s, 2s) on connection errors,
+    429 and 5xx, honoring Retry-After.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "HEAD"),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get(url, params=None, timeout=None, **kwargs):
+    """
+    requests.get through the shared session. Identical requests already in flight
+    on another thread share that request's response instead of sending a new one.
+    Streaming requests are never coalesced.
+    """
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    if kwargs.get("stream"):
+        return _send(url, params, timeout, **kwargs)
+
+    key = (url, tuple(sorted((params or {}).items())), tuple(sorted(kwargs.items(), key=str)))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            from concurrent.futures import Future
+            future = _in_flight[key] = Future()
+    if not owner:
+        _count("coalesced")
+        return future.result()
+
+    try:
+        response = _send(url, params, timeout, **kwargs)
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _send(url, params, timeout, **kwargs):
+    _count("requests")
+    response = get_session().get(url, params=params, timeout=timeout, **kwargs)
+    retries = getattr(response.raw, "retries", None)
+    if retries is not None:
+        _count("retries", len(retries.history))
+    return response
+
+
+def connection_stats():
+    """
+    Returns (totals, hosts): request/coalesced/retry counters, and per host the
+    requests sent and connections opened, so reuse is requests minus connections.
+    """
+    hosts = []
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                hosts.append((f"{pool.scheme}://{pool.host}:{pool.port}", pool.num_requests, pool.num_connections))
+    with _stats_lock:
+        totals = dict(_stats)
+    return totals, hosts
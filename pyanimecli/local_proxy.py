@@ -0,0 +1,291 @@
+import os, re, hashlib, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+from . import cache, http_client
+
+MAX_SEGMENT_CACHE_BYTES = 1024 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+IN_FLIGHT_WAIT = 60  # seconds a request waits for another client's download of the same URL
+
+URI_ATTRIBUTE = re.compile(r'URI="([^"]+)"')
+PATH_PREFIX = "/cors?url="  # same shape as the remote proxy, so PROXY_URL can point here
+# Query parameters that carry expiring access tokens on stream CDNs. They are
+# left out of cache keys, so a later session's fresh token still hits the cache;
+# every other parameter may pick the resource and stays in the key.
+TOKEN_PARAMS = {"token", "expires", "exp", "expiry", "sig", "signature", "hash", "hdnts", "hdntl", "policy", "key-pair-id"}
+
+_server = None
+_referers = {}  # upstream host -> Referer from the watch response
+_last_referer = None  # for segment hosts no watch response named
+_lock = threading.Lock()
+
+
+def segment_dir():
+    return os.path.join(cache.cache_root(), "segments")
+
+
+def start():
+    """Starts the proxy on a loopback port, once per process. Returns its URL prefix, used like PROXY_URL."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = LocalProxy(("127.0.0.1", 0))
+            threading.Thread(target=_server.serve_forever, name="local-proxy", daemon=True).start()
+        return _server.prefix
+
+
+def register(stream_data):
+    """Remembers the Referer a watch response asks for, for its source and subtitle hosts."""
+    global _last_referer
+    referer = ((stream_data or {}).get("headers") or {}).get("Referer")
+    if not referer:
+        return
+    tracks = (stream_data.get("sources") or []) + (stream_data.get("subtitles") or [])
+    with _lock:
+        for track in tracks:
+            if track.get("url"):
+                _referers[urlsplit(track["url"]).netloc] = referer
+        _last_referer = referer
+
+
+def upstream_headers(url):
+    with _lock:
+        referer = _referers.get(urlsplit(url).netloc, _last_referer)
+    return {"Referer": referer} if referer else {}
+
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def is_playlist(url, content_type):
+    return "mpegurl" in content_type.lower() or urlsplit(url).path.endswith(".m3u8")
+
+
+def upstream_url(path):
+    """
+    The upstream URL in a request path, or "" when it has none. Playlists this
+    proxy rewrites carry it percent-encoded, so it is decoded exactly once;
+    URLs appended to the prefix as they are (see hls.Playlist.wrap) arrive
+    unencoded and are used unchanged, so tokens holding %XX survive either way.
+    """
+    if not path.startswith(PATH_PREFIX):
+        return ""
+    url = path[len(PATH_PREFIX):]
+    if not url.startswith(("http://", "https://")):
+        url = unquote(url)
+    return url if url.startswith(("http://", "https://")) else ""
+
+
+def cache_key(url):
+    """`url` without its fragment and its expiring-token query parameters."""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name.lower() not in TOKEN_PARAMS and not name.lower().startswith("x-amz-")]
+    return urlunsplit(parts[:3] + (urlencode(query), ""))
+
+
+def rewrite_playlist(text, base_url, prefix):
+    """Points every URI in a playlist, including URI="..." attributes, at the proxy."""
+    def local(uri):
+        return prefix + quote(urljoin(base_url, uri), safe="")
+
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            line = local(stripped)
+        elif stripped.startswith("#EXT"):
+            line = URI_ATTRIBUTE.sub(lambda match: f'URI="{local(match.group(1))}"', line)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def parse_range(header, size):
+    """Returns (start, end) inclusive for a single "bytes=" range, or None."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    return (start, end) if start <= end < size else None
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = upstream_url(self.path)
+        if not url:
+            self.reply(404, b"not found", "text/plain")
+            return
+        try:
+            self.server.serve(self, url)
+        except (ConnectionError, TimeoutError):
+            self.close_connection = True
+
+    def reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalProxy(ThreadingHTTPServer):
+    """
+    A loopback stand-in for the remote CORS proxy. Requests go straight to the
+    upstream URL with the Referer from the watch response. Playlists are
+    rewritten to point back here, and everything else (segments, keys, init
+    sections, subtitles) is kept in a size-bounded LRU on disk, so replays,
+    resumed downloads and watch-after-download are served locally. Concurrent
+    requests for one uncached URL share a single upstream download.
+    """
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, ProxyHandler)
+        self.prefix = f"http://127.0.0.1:{self.server_address[1]}{PATH_PREFIX}"
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def cache_path(self, url):
+        return os.path.join(segment_dir(), hashlib.sha1(cache_key(url).encode()).hexdigest() + ".seg")
+
+    def serve(self, handler, url):
+        range_header = handler.headers.get("Range")
+        if not cache.enabled:
+            self.forward(handler, url, range_header)
+            return
+        path = self.cache_path(url)
+        if self.send_cached(handler, path, range_header):
+            return
+
+        with self._in_flight_lock:
+            done = self._in_flight.get(path)
+            owner = done is None
+            if owner:
+                done = self._in_flight[path] = threading.Event()
+        if not owner:
+            done.wait(IN_FLIGHT_WAIT)
+            if not self.send_cached(handler, path, range_header):
+                self.forward(handler, url, range_header)
+            return
+        try:
+            self.misses += 1
+            self.forward(handler, url, range_header, store=None if range_header else path)
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[path]
+            done.set()
+
+    def send_cached(self, handler, path, range_header):
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return False
+        with f:
+            try:
+                os.utime(path)  # mtime doubles as the last-used time for LRU eviction
+            except OSError:
+                pass  # evicted meanwhile; the open file can still be served
+            size = os.fstat(f.fileno()).st_size
+            span = parse_range(range_header, size) if range_header else None
+            start, end = span or (0, size - 1)
+            handler.send_response(206 if span else 200)
+            handler.send_header("Content-Type", "application/octet-stream")
+            handler.send_header("Content-Length", str(end - start + 1))
+            handler.send_header("Accept-Ranges", "bytes")
+            if span:
+                handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            handler.end_headers()
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                handler.wfile.write(chunk)
+                remaining -= len(chunk)
+        self.hits += 1
+        return True
+
+    def forward(self, handler, url, range_header=None, store=None):
+        """
+        Fetches `url` upstream and relays it. Playlists are rewritten; any other
+        complete (200) body is also written to the cache file `store`.
+        """
+        import requests
+        headers = upstream_headers(url)
+        if range_header:
+            headers["Range"] = range_header
+        try:
+            response = http_client.get(url, headers=headers, stream=True)
+        except requests.exceptions.RequestException as e:
+            handler.reply(502, str(e).encode(), "text/plain")
+            return
+        with response:
+            content_type = response.headers.get("Content-Type", "application/octet-stream")
+            if response.status_code >= 400:
+                handler.reply(response.status_code, response.content, content_type)
+                return
+            if is_playlist(url, content_type):
+                body = rewrite_playlist(response.text, response.url, self.prefix).encode()
+                handler.reply(200, body, "application/vnd.apple.mpegurl")
+                return
+
+            handler.send_response(response.status_code)
+            handler.send_header("Content-Type", content_type)
+            # requests decodes Content-Encoding, so the upstream length only holds for identity bodies.
+            length = None if "Content-Encoding" in response.headers else response.headers.get("Content-Length")
+            if length:
+                handler.send_header("Content-Length", length)
+            else:
+                handler.send_header("Connection", "close")
+                handler.close_connection = True
+            for name in ("Content-Range", "Accept-Ranges"):
+                if name in response.headers:
+                    handler.send_header(name, response.headers[name])
+            handler.end_headers()
+
+            cache_file = None
+            if store and response.status_code == 200:
+                tmp_path = f"{store}.{threading.get_ident()}.tmp"
+                try:
+                    os.makedirs(os.path.dirname(store), exist_ok=True)
+                    cache_file = open(tmp_path, "wb")
+                except OSError:
+                    pass  # relay without caching
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    handler.wfile.write(chunk)
+                    if cache_file:
+                        try:
+                            cache_file.write(chunk)
+                        except OSError:
+                            cache_file.close()  # e.g. disk full: keep relaying, uncached
+                            discard(tmp_path)
+                            cache_file = None
+            except BaseException:
+                if cache_file:
+                    cache_file.close()
+                    discard(tmp_path)
+                raise
+        if cache_file:
+            cache_file.close()
+            try:
+                os.replace(tmp_path, store)
+                cache.written(os.path.getsize(store), MAX_SEGMENT_CACHE_BYTES, segment_dir())
+            except OSError:
+                discard(tmp_path)
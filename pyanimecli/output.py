@@ -0,0 +1,64 @@
+import re, sys, json
+from contextlib import nullcontext
+
+# "json" or "ndjson" once --json/--ndjson is given. Records then go to stdout
+# as they are decoded, messages go to stderr, and rich is never imported.
+mode = None
+_rich_console = None
+
+MARKUP = re.compile(r"\[/?[a-z][a-z0-9 #._-]*\]|\[/\]")
+
+
+class PlainConsole:
+    """The console under --json/--ndjson: markup is stripped and text goes to stderr, so stdout only carries records."""
+
+    def print(self, *objects, sep=" ", end="\n", **kwargs):
+        sys.stderr.write(sep.join(MARKUP.sub("", str(obj)) for obj in objects) + end)
+        sys.stderr.flush()
+
+    def status(self, *args, **kwargs):
+        return nullcontext()
+
+
+def rich_console():
+    """The process's rich Console, created on first call. For rich objects such as Live and Progress that need the real one."""
+    global _rich_console
+    if _rich_console is None:
+        try:
+            from rich.console import Console
+        except ImportError:
+            print("Error: The 'rich' library is required. Please install it using 'pip install rich'.")
+            sys.exit(1)
+        _rich_console = Console()
+    return _rich_console
+
+
+class LazyConsole:
+    """
+    Stands in for rich's Console, which is only created (and rich only imported)
+    on first use. While a machine-readable mode is set it is a PlainConsole, so
+    the same console.print calls serve both.
+    """
+
+    def __init__(self):
+        self._plain = PlainConsole()
+
+    def __getattr__(self, name):
+        return getattr(self._plain if mode else rich_console(), name)
+
+
+console = LazyConsole()
+
+
+def emit(records):
+    """Writes records to stdout as one compact JSON document per line, flushing once per batch."""
+    sys.stdout.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+    sys.stdout.flush()
+
+
+def emit_response(data, items=None):
+    """
+    --json writes a decoded response as one line. --ndjson writes one line per
+    item when the response is a listing (`items`), otherwise the response itself.
+    """
+    emit(items if mode == "ndjson" and items is not None else [data])
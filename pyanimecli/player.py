@@ -0,0 +1,193 @@
+import os, re, sys, time, queue, subprocess
+from threading import Thread
+
+from . import profiler
+from .tui import FrameEncoder
+
+BUFSIZE = 20
+AUDIO_GRACE = 5.0  # seconds to hold the first frame while ffplay buffers audio
+MAX_EXTRAPOLATION = 0.5  # seconds the clock may run ahead of the last ffplay report
+
+
+class AudioClock:
+    """
+    Plays a stream's audio with ffplay and uses its reported playback position as
+    the master clock for video. Until ffplay reports a position, `time()` returns
+    None so the first frame is held; after AUDIO_GRACE seconds without audio, or
+    once ffplay exits, the clock keeps running on wall-clock time. With
+    `stdin_fd`, a pipe's read end that start() hands over to ffplay and closes,
+    `source` is "pipe:0".
+    """
+    STATUS = re.compile(r"^\s*(\d+\.\d+)\s")
+
+    def __init__(self, source, input_options=(), stdin_fd=None):
+        self.source = source
+        self.input_options = list(input_options)
+        self.stdin_fd = stdin_fd
+        self.proc = None
+        self.started = None
+        self.position = None
+        self.updated = None
+
+    def start(self):
+        self.started = time.monotonic()
+        try:
+            with profiler.span("ffplay.start", "subprocess"):
+                self.proc = subprocess.Popen(
+                    ["ffplay", "-vn", "-nodisp", "-autoexit", "-stats", *self.input_options, self.source],
+                    stdin=subprocess.DEVNULL if self.stdin_fd is None else self.stdin_fd,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                )
+        finally:
+            if self.stdin_fd is not None:
+                os.close(self.stdin_fd)
+                self.stdin_fd = None
+        Thread(target=self._read_status, daemon=True).start()
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait()
+
+    def _read_status(self):
+        # ffplay rewrites its status line in place with "\r"; the first field is the clock.
+        pending = b""
+        while True:
+            chunk = self.proc.stderr.read1(4096)
+            if not chunk:
+                break
+            *lines, pending = re.split(rb"[\r\n]", pending + chunk)
+            for line in lines:
+                match = self.STATUS.match(line.decode(errors="ignore"))
+                if match:
+                    self.position = float(match.group(1))
+                    self.updated = time.monotonic()
+
+    def time(self):
+        if self.started is None:
+            return None
+        now = time.monotonic()
+        if self.updated is None:
+            if now - self.started < AUDIO_GRACE and self.proc.poll() is None:
+                return None
+            self.position, self.updated = 0.0, now
+        elapsed = now - self.updated
+        if self.proc.poll() is None:
+            elapsed = min(elapsed, MAX_EXTRAPOLATION)
+        return self.position + elapsed
+
+
+class PlaybackStats:
+    """Counters for one playback session."""
+
+    def __init__(self):
+        self.presented = 0
+        self.dropped = 0
+        self.late = 0
+        self.buffered = 0  # frames waiting in the queue when the last one was taken
+        self.buffered_total = 0
+        self.taken = 0
+
+    @property
+    def mean_buffered(self):
+        """Frames waiting on average whenever one was taken; near zero means rendering can't keep up."""
+        return self.buffered_total / self.taken if self.taken else 0.0
+
+
+def render_frames(frames, fps, frame_queue, encoder, clock, stats, pool=None):
+    """
+    Producer: encodes `frames` and puts (index, base, keys, output) on `frame_queue`,
+    blocking while it is full. `base` is the index of the frame `output` is a delta
+    against, or None for a full repaint. Frames already behind the clock are skipped
+    without encoding. With a RenderPool, encoding runs on its worker processes.
+    """
+    frame_time = 1.0 / fps
+
+    def due_frames():
+        for index, frame in enumerate(frames):
+            now = clock.time()
+            if now is not None and index * frame_time < now - frame_time:
+                stats.dropped += 1
+                continue
+            yield index, frame
+
+    base = None
+    if pool is None:
+        for index, frame in due_frames():
+            with profiler.span("render.encode", "render", frame=index):
+                keys = encoder.pack(frame)
+                full_frames = encoder.full_frames
+                output = encoder.encode_keys(keys)
+            frame_queue.put((index, None if encoder.full_frames != full_frames else base, keys, output))
+            base = index
+    else:
+        results = pool.encode(due_frames())
+        while True:
+            with profiler.span("render.pool", "render"):
+                result = next(results, None)
+            if result is None:
+                break
+            index, frame, output, is_full = result
+            frame_queue.put((index, None if is_full else base, encoder.pack(frame), output))
+            base = index
+    frame_queue.put(None)
+
+
+def play(frames, fps, clock, encoder=None, buffer_size=BUFSIZE, pool=None, overlay=None):
+    """
+    Renders `frames` on a background thread (or a RenderPool) into a bounded queue
+    and presents them against `clock`. A frame is dropped when it is more than one
+    frame late and a newer frame is already waiting. A SubtitleOverlay is drawn
+    over each presented frame. Returns the PlaybackStats.
+    """
+    encoder = encoder or FrameEncoder()
+    stats = PlaybackStats()
+    frame_queue = queue.Queue(maxsize=buffer_size)
+    producer = Thread(target=render_frames, args=(frames, fps, frame_queue, encoder, clock, stats, pool), daemon=True)
+    producer.start()
+
+    while not frame_queue.full() and producer.is_alive():
+        time.sleep(0.01)
+    clock.start()
+
+    frame_time = 1.0 / fps
+    resync = FrameEncoder(encoder.mode, encoder.dither)
+    shown, shown_keys = None, None
+    while True:
+        item = frame_queue.get()
+        if item is None:
+            break
+        index, base, keys, output = item
+        stats.buffered = frame_queue.qsize()
+        stats.buffered_total += stats.buffered
+        stats.taken += 1
+
+        pts = index * frame_time
+        with profiler.span("present.wait", "present"):
+            now = clock.time()
+            while now is None or now < pts:
+                time.sleep(0.005 if now is None else min(pts - now, frame_time))
+                now = clock.time()
+
+        lag = now - pts
+        if lag > frame_time and not frame_queue.empty():
+            stats.dropped += 1
+            continue
+        if lag > frame_time / 2:
+            stats.late += 1
+
+        if base is not None and base != shown:
+            # The delta was made against a frame that never reached the screen.
+            resync.previous = shown_keys
+            with profiler.span("present.resync", "present"):
+                output = resync.encode_keys(keys)
+        if overlay is not None:
+            with profiler.span("present.subtitles", "present"):
+                output += overlay.update(pts, keys, bool(output))
+        with profiler.span("present.write", "present", bytes=len(output)):
+            sys.stdout.write(output)
+            sys.stdout.flush()
+        shown, shown_keys = index, keys
+        stats.presented += 1
+
+    return stats
@@ -0,0 +1,107 @@
+import os, multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .tui import FrameEncoder
+
+_worker_state = {}
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _attach(name, shape):
+    memory = shared_memory.SharedMemory(name=name)
+    _worker_state["memory"] = memory  # keep the mapping alive for the worker's lifetime
+    _worker_state["frames"] = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+
+
+def _encode_slot(slot, previous_slot, mode, dither):
+    """Worker: encodes one frame as a delta against another slot, or in full."""
+    frames = _worker_state["frames"]
+    encoder = FrameEncoder(mode, dither)
+    if previous_slot is not None:
+        encoder.previous = encoder.pack(frames[previous_slot])
+    output = encoder.encode_keys(encoder.pack(frames[slot]))
+    return output, encoder.full_frames == 1
+
+
+class RenderPool:
+    """
+    Encodes frames on a pool of worker processes. Frames are copied into a ring of
+    shared-memory slots instead of being pickled, each worker encodes its frame as
+    a delta against the previous one, and results come back in submission order.
+    `mode` and `dither` are passed to each worker's FrameEncoder.
+    """
+
+    def __init__(self, workers=None, mode="truecolor", dither=False):
+        self.workers = workers or default_workers()
+        self.mode = mode
+        self.dither = dither
+        self.slots = self.workers * 2 + 2
+        self.memory = None
+        self.executor = None
+        self.frames = None
+
+    def _start(self, frame_shape):
+        shape = (self.slots,) + tuple(frame_shape)
+        self.memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.frames = np.ndarray(shape, dtype=np.uint8, buffer=self.memory.buf)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach,
+            initargs=(self.memory.name, shape),
+        )
+
+    def encode(self, items):
+        """
+        Takes (key, frame) pairs and yields (key, frame, output, is_full) in the same
+        order. Each output is a delta against the previous frame in `items`.
+        `frame` is the pool's shared copy, valid until the next item is requested.
+        """
+        pending = deque()
+        # A slot is rewritten `slots` frames later; it is still read as the previous
+        # frame by the task right after it, so keep two slots of headroom.
+        in_flight = self.slots - 2
+        previous_slot = None
+        for index, (key, frame) in enumerate(items):
+            frame = np.asarray(frame, dtype=np.uint8)
+            if self.executor is None:
+                self._start(frame.shape)
+            elif frame.shape != self.frames.shape[1:]:
+                raise ValueError("All frames passed to a RenderPool must have the same shape.")
+
+            while len(pending) >= in_flight:
+                yield self._collect(pending)
+            slot = index % self.slots
+            self.frames[slot] = frame
+            pending.append((key, slot, self.executor.submit(_encode_slot, slot, previous_slot, self.mode, self.dither)))
+            previous_slot = slot
+        while pending:
+            yield self._collect(pending)
+
+    def _collect(self, pending):
+        key, slot, future = pending.popleft()
+        output, is_full = future.result()
+        return key, self.frames[slot], output, is_full
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        if self.memory is not None:
+            self.frames = None
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,170 @@
+import os, json, time, threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+from . import cache, hls, http_client, profiler
+
+PROBE_DEADLINE = 3.0  # seconds for the whole probe; slower sources count as failed
+PROBE_PATIENCE = 2.0  # once one source has answered in T seconds, wait until PROBE_PATIENCE * T for the rest
+PROBE_BYTES = 256 * 1024  # read from each source's first segment to measure throughput
+HOST_TTL = 6 * 3600  # seconds a host's measurement is reused
+FAILED_TTL = 10 * 60  # a failed probe is retried sooner
+REFERENCE_BYTES = 1_000_000  # sources are ranked by the estimated time to fetch this much
+
+_hosts = None  # host -> measurement, loaded from hosts.json on first use
+_hosts_lock = threading.Lock()
+
+
+def hosts_path():
+    return os.path.join(cache.cache_root(), "hosts.json")
+
+
+def upstream_host(url, proxy_prefix=""):
+    """The CDN host of a stream URL, looking through the proxy prefix."""
+    if proxy_prefix and url.startswith(proxy_prefix):
+        url = url[len(proxy_prefix):]
+    return urlsplit(url).netloc
+
+
+def _load_hosts():
+    global _hosts
+    if _hosts is None:
+        _hosts = {}
+        if cache.enabled:
+            try:
+                with open(hosts_path(), encoding="utf-8") as f:
+                    _hosts = json.load(f)
+            except (OSError, ValueError):
+                pass
+    return _hosts
+
+
+def known(host):
+    """Returns the fresh measurement for `host`, or None."""
+    if cache.refresh:
+        return None
+    with _hosts_lock:
+        result = _load_hosts().get(host)
+    if result is None or time.time() - result["measured"] > (HOST_TTL if result["ok"] else FAILED_TTL):
+        return None
+    return result
+
+
+def remember(results):
+    with _hosts_lock:
+        hosts = _load_hosts()
+        hosts.update(results)
+        if not cache.enabled:
+            return
+        try:
+            cache.write_atomic(hosts_path(), json.dumps(hosts).encode())
+        except OSError:
+            pass
+
+
+def score(result):
+    """Estimated seconds to start and fetch REFERENCE_BYTES; lower is better, failures last."""
+    if not result or not result.get("ok") or not result.get("throughput"):
+        return float("inf")
+    return result["ttfb"] + REFERENCE_BYTES / result["throughput"]
+
+
+def probe_source(url, quality, proxy_prefix, deadline):
+    """
+    Fetches a source's playlist (and its `quality` variant) and the start of
+    its first segment before `deadline` (a time.monotonic() value). Returns the
+    time from the start to the first segment byte, and the segment's throughput
+    in bytes/s counted from its request.
+    """
+    import requests
+    start = time.monotonic()
+    result = {"ok": False, "measured": time.time()}
+
+    def remaining():
+        left = max(0.1, deadline - time.monotonic())
+        return (left, left)
+
+    try:
+        playlist = hls.Playlist(url, proxy_prefix, timeout=remaining())
+        if playlist.is_master:
+            variant = hls.select_variant(playlist.variants(), quality)
+            if variant is None:
+                return result
+            playlist = hls.Playlist(variant["url"], proxy_prefix, timeout=remaining())
+        segment = next((entry for entry in playlist.segments() if entry["kind"] == "segment"), None)
+        if segment is None:
+            return result
+        requested = time.monotonic()
+        response = http_client.get(segment["url"], stream=True, timeout=remaining())
+        response.raise_for_status()
+        received, first_byte = 0, None
+        with response:
+            for chunk in response.iter_content(hls.PREFETCH_CHUNK):
+                if first_byte is None:
+                    first_byte = time.monotonic()
+                received += len(chunk)
+                if received >= PROBE_BYTES or time.monotonic() > deadline:
+                    break
+        if first_byte is None:
+            return result
+        elapsed = max(time.monotonic() - requested, 1e-3)
+        result.update(ok=True, ttfb=first_byte - start, throughput=received / elapsed)
+    except (requests.exceptions.RequestException, hls.HLSError, ValueError):
+        pass
+    return result
+
+
+def _start_probe(url, quality, proxy_prefix, deadline):
+    """
+    Runs probe_source on a daemon thread and returns a Future for its result.
+    The session's retries can keep a dead host's probe going well past the
+    deadline; unlike executor threads, these are not joined at exit.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(probe_source(url, quality, proxy_prefix, deadline))
+        except BaseException as e:
+            future.set_exception(e)
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def pick_source(stream_data, quality, proxy_prefix=""):
+    """
+    Returns the URL of the best source in a watch response for `quality`.
+    With several sources, each unmeasured host is probed concurrently within
+    PROBE_DEADLINE, or PROBE_PATIENCE times the first successful probe, and the
+    results are kept per host for HOST_TTL, so later sessions rank sources
+    without probing. A single source is returned as is.
+    """
+    urls = [source["url"] for source in (stream_data or {}).get("sources") or [] if source.get("url")]
+    if len(urls) <= 1:
+        return urls[0] if urls else None
+
+    hosts = {url: upstream_host(url, proxy_prefix) for url in urls}
+    measured = {host: known(host) for host in set(hosts.values())}
+    unknown = [url for url in urls if measured[hosts[url]] is None]
+    if unknown:
+        start = time.monotonic()
+        deadline = start + PROBE_DEADLINE
+        with profiler.span("stream.probe", "download", sources=len(unknown)):
+            futures = {_start_probe(url, quality, proxy_prefix, deadline): url for url in unknown}
+            pending, cutoff = set(futures), deadline
+            while pending:
+                done, pending = wait(pending, timeout=max(0, cutoff - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                if any(future.result()["ok"] for future in done):
+                    cutoff = min(cutoff, start + PROBE_PATIENCE * (time.monotonic() - start))
+        fresh = {}
+        for future, url in futures.items():
+            result = future.result() if future.done() else {"ok": False, "measured": time.time()}
+            host = hosts[url]
+            if host not in fresh or score(result) < score(fresh[host]):
+                fresh[host] = result
+        remember(fresh)
+        measured.update(fresh)
+    # sorted() is stable, so ties (and all-failed probes) keep the API's order.
+    return sorted(urls, key=lambda url: score(measured[hosts[url]]))[0]
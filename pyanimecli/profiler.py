@@ -0,0 +1,77 @@
+import os, json, time, threading
+from contextlib import nullcontext
+
+enabled = False  # --profile turns span recording on
+
+_events = []
+_threads = {}
+_lock = threading.Lock()
+_origin = time.perf_counter_ns()
+_disabled = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        thread = threading.current_thread()
+        event = {
+            "name": self.name, "cat": self.category, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+            "ts": (self.start - _origin) / 1000, "dur": (end - self.start) / 1000,
+        }
+        if self.args:
+            event["args"] = self.args
+        with _lock:
+            _events.append(event)
+            _threads[thread.ident] = thread.name
+        return False
+
+
+def span(name, category="cli", **args):
+    """
+    Times a with-block as a named span while profiling is enabled. When it is
+    not, this returns a shared no-op context manager, so call sites cost one
+    function call.
+    """
+    if not enabled:
+        return _disabled
+    return _Span(name, category, args)
+
+
+def reset():
+    """Drops the spans recorded so far."""
+    with _lock:
+        _events.clear()
+        _threads.clear()
+
+
+def summary():
+    """Returns (name, calls, total_ms, mean_ms, max_ms) per span name, largest total first."""
+    phases = {}
+    with _lock:
+        for event in _events:
+            calls, total, longest = phases.get(event["name"], (0, 0.0, 0.0))
+            phases[event["name"]] = (calls + 1, total + event["dur"], max(longest, event["dur"]))
+    rows = [(name, calls, total / 1000, total / calls / 1000, longest / 1000) for name, (calls, total, longest) in phases.items()]
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def write_trace(path):
+    """Writes the recorded spans as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    with _lock:
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "pyanimecli"}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in _threads.items()]
+        trace = {"traceEvents": metadata + _events, "displayTimeUnit": "ms"}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
@@ -1,61 +1,95 @@
 import sys
 import argparse
-import requests
-import platform
-import subprocess
-import tempfile
 import shutil
 import os
 import re
+import time
 from urllib.parse import quote
-try:
-    from pym3u8downloader import M3U8Downloader
-except ImportError:
-    M3U8Downloader = None
-    
-try:
-    from packaging import version as semver
-except ImportError:
-    semver = None
-
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.text import Text
-    from rich.live import Live
-    from rich.spinner import Spinner
-except ImportError:
-    print("Error: The 'rich' library is required. Please install it using 'pip install rich'.")
-    sys.exit(1)
+from . import output, profiler
+# requests, rich, subprocess and the download/playback modules are imported by
+# the functions that use them, so -h, -v and other quick commands start fast,
+# and --json/--ndjson runs never load rich at all.
 
 __version__ = "1.0.8"
 PACKAGE_NAME = "pyanimecli"
 
-console = Console()
-
-BASE_URL = "https://yumaapi.vercel.app"
-PROXY_URL = "https://gammam3u8proxy-fxsb.vercel.app/cors?url="
+console = output.console
+
+BASE_URL = os.environ.get("PYANIMECLI_BASE_URL", "https://yumaapi.vercel.app")
+PYPI_URL = os.environ.get("PYANIMECLI_PYPI_URL", "https://pypi.org/pypi")
+PROXY_URL = os.environ.get("PYANIMECLI_PROXY_URL", "https://gammam3u8proxy-fxsb.vercel.app/cors?url=")
+TUI_FPS = 10
+DEFAULT_QUALITY = "720"
+EPISODE_WORKERS = 2
+STREAM_LOOKAHEAD = 3
+PAGE_WORKERS = 4
+PREFETCH_DELAY = 15  # seconds into an episode before autoplay starts fetching the next one
+PREFETCH_SEGMENTS = 3
+PREFETCH_RATE = 1_000_000  # bytes per second, so the prefetch leaves the playing stream its bandwidth
+OFFLINE_PAGE_SIZE = 20
+OFFLINE_RESULTS = 200  # ranked matches -s --offline pages through
+OFFLINE_SUGGESTIONS = 10  # matches -ss --offline shows
+
+result_rows = None  # the shell sets a list; listings then number their rows and record the items shown
+
+def stream_source(stream_data, quality=DEFAULT_QUALITY):
+    """The URL of the fastest source in a watch response, probing when there are several."""
+    from . import local_proxy
+    from .probe import pick_source
+    local_proxy.register(stream_data)  # the local proxy, if running, sends this response's Referer
+    return pick_source(stream_data, quality, PROXY_URL)
 
 def proxy_url(url):
     if not url:
         return ""
     return f"{PROXY_URL}{url}"
 
-def make_request(endpoint, params=None):
+def make_request(endpoint, params=None, quiet=False):
+    """Fetches an API endpoint. `quiet` skips the spinner, for calls made from worker threads."""
+    import requests
+    from contextlib import nullcontext
+    from . import cache as response_cache
+    from . import http_client
+
+    with profiler.span("api.cache", "api"):
+        cached = response_cache.load(endpoint, params) if not response_cache.refresh else None
+    if response_cache.is_fresh(cached):
+        return cached["data"]
+
     url = f"{BASE_URL}/{endpoint}"
-    spinner = Spinner("dots", text=Text(f"Fetching data from {url}...", style="cyan"))
-    with Live(spinner, console=console, transient=True, refresh_per_second=20):
+    if quiet or output.mode:
+        spinner = nullcontext()
+    else:
+        from rich.live import Live
+        from rich.spinner import Spinner
+        from rich.text import Text
+        spinner = Live(Spinner("dots", text=Text(f"Fetching data from {url}...", style="cyan")),
+                       console=output.rich_console(), transient=True, refresh_per_second=20)
+    with spinner:
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            with profiler.span("api.request", "api", endpoint=endpoint):
+                response = http_client.get(url, params=params)
+                response.raise_for_status()
+            with profiler.span("api.decode", "api", bytes=len(response.content)):
+                data = response.json()
         except requests.exceptions.RequestException as e:
             console.print(f"[bold red]API Request Error:[/bold red] {e}")
-            return None
+            return stale_response(endpoint, params)
         except ValueError:
             console.print("[bold red]API Error:[/bold red] Failed to decode JSON from response.")
-            return None
+            return stale_response(endpoint, params)
+
+    response_cache.store(endpoint, params, data)
+    return data
+
+def stale_response(endpoint, params):
+    from . import cache as response_cache
+    cached = response_cache.load(endpoint, params)
+    if cached is None:
+        return None
+    stored = time.strftime("%Y-%m-%d %H:%M", time.localtime(cached["stored"]))
+    console.print(f"[yellow]Showing cached data from {stored}; the API could not be reached.[/yellow]")
+    return cached["data"]
 
 def clean_description(description):
     if not description:
@@ -66,12 +100,33 @@ def clean_description(description):
 def check_executable(name):
     return shutil.which(name) is not None
 
-def display_search_results(results, title="Search Results"):
-    if not results or not results.get("results"):
-        console.print("[yellow]No results found.[/yellow]")
-        return
+def cover_art(urls, size):
+    """
+    Rendered covers as {url: Text} when -thumbnails is on, fetched concurrently
+    and cached on disk. Empty when it is off or Pillow/numpy are missing.
+    """
+    from . import thumbnails
+    if not thumbnails.enabled:
+        return {}
+    try:
+        rendered = thumbnails.render_many(urls, *size)
+    except ImportError:
+        console.print("[yellow]Thumbnails need Pillow and numpy: pip install pyanimecli[tui][/yellow]")
+        thumbnails.enabled = False
+        return {}
+    from rich.text import Text
+    return {url: Text.from_ansi(text) for url, text in rendered.items()}
 
-    table = Table(title=f"[bold cyan]{title}[/bold cyan]", show_header=True, header_style="bold magenta")
+def search_results_table(items, title=None, show_header=True, expand=False):
+    from rich.table import Table
+    from . import thumbnails
+    art = cover_art([item.get("image") for item in items], thumbnails.RESULT_SIZE)
+    table = Table(title=f"[bold cyan]{title}[/bold cyan]" if title else None, show_header=show_header, header_style="bold magenta", expand=expand)
+    numbered = result_rows is not None
+    if numbered:
+        table.add_column("#", style="cyan", justify="right", no_wrap=True)
+    if art:
+        table.add_column("Cover", width=thumbnails.RESULT_SIZE[0], no_wrap=True)
     table.add_column("ID", style="dim", width=40)
     table.add_column("Title", style="bold white", min_width=20)
     table.add_column("Type", style="green", width=8)
@@ -79,8 +134,15 @@ def display_search_results(results, title="Search Results"):
     table.add_column("Dub", style="red", width=5)
     table.add_column("Duration", style="yellow", width=10)
 
-    for item in results["results"]:
+    for item in items:
+        row = []
+        if numbered:
+            result_rows.append(item)
+            row.append(str(len(result_rows)))
+        if art:
+            row.append(art.get(item.get("image"), ""))
         table.add_row(
+            *row,
             item.get("id", "N/A"),
             item.get("title", "N/A"),
             item.get("type", "N/A"),
@@ -88,15 +150,107 @@ def display_search_results(results, title="Search Results"):
             str(item.get("dub", "0")),
             item.get("duration", "N/A")
         )
+    return table
 
-    console.print(table)
+def display_search_results(results, title="Search Results"):
+    if output.mode:
+        output.emit_response(results, (results or {}).get("results") or [])
+        return
+    if not results or not results.get("results"):
+        console.print("[yellow]No results found.[/yellow]")
+        return
+
+    console.print(search_results_table(results["results"], title))
     console.print(f"Page [bold]{results.get('current_page', 1)}[/bold] of [bold]{results.get('total_pages', 1)}[/bold]. Use -p <page_number> to navigate.")
 
+def parse_page_range(spec):
+    """Turns "3", "1-5" or "all" into (first, last); last is None for "all"."""
+    spec = str(spec).strip().lower()
+    if spec == "all":
+        return 1, None
+    start, _, end = spec.partition("-")
+    first = int(start)
+    last = int(end) if end else first
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid page range '{spec}'.")
+    return first, last
+
+def fetch_listing(endpoint, params, page_spec, title):
+    """
+    Fetches and displays one page, or a range of pages. For a range, the first
+    page's total_pages plans the rest, which are fetched PAGE_WORKERS at a time.
+    Pages are printed in order as soon as they and every page before them have
+    arrived, skipping items already shown on an earlier page.
+    """
+    try:
+        first, last = parse_page_range(page_spec)
+    except ValueError as e:
+        console.print(f"[bold red]Invalid page:[/bold red] {e} Use a number, a range such as 1-5, or 'all'.")
+        return
+    data = make_request(endpoint, params={**params, "page": first})
+    if not data:
+        return
+    if result_rows is not None:
+        result_rows.clear()
+    if first == last or not data.get("results"):
+        display_search_results(data, title=title)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    total_pages = int(data.get("total_pages") or first)
+    last = total_pages if last is None else min(last, total_pages)
+    pages = {first: data}
+    failed, seen = [], set()
+    next_page, shown, duplicates = first, 0, 0
+
+    def print_ready():
+        nonlocal next_page, shown, duplicates
+        while next_page in pages:
+            page_data = pages.pop(next_page)
+            items = []
+            for item in (page_data or {}).get("results") or []:
+                item_id = item.get("id")
+                if item_id is not None and item_id in seen:
+                    duplicates += 1
+                    continue
+                seen.add(item_id)
+                items.append(item)
+            if page_data is None:
+                failed.append(next_page)
+            elif items:
+                if output.mode:
+                    output.emit_response({**page_data, "results": items}, items)
+                else:
+                    console.print(search_results_table(items, title if shown == 0 else None, show_header=shown == 0, expand=True))
+                shown += len(items)
+            next_page += 1
+
+    print_ready()
+    with console.status(f"Fetching pages {first + 1}-{last}...", spinner="dots"), ThreadPoolExecutor(max_workers=PAGE_WORKERS) as pool:
+        futures = {pool.submit(make_request, endpoint, {**params, "page": page}, True): page for page in range(first + 1, last + 1)}
+        for future in as_completed(futures):
+            pages[futures[future]] = future.result()
+            print_ready()
+
+    summary = f"Pages [bold]{first}-{last}[/bold] of [bold]{total_pages}[/bold]: {shown} results"
+    if duplicates:
+        summary += f" ({duplicates} duplicates removed)"
+    console.print(summary + ".")
+    if failed:
+        console.print(f"[yellow]Could not fetch page(s): {', '.join(map(str, failed))}[/yellow]")
+
 def display_anime_info(info):
     if not info:
         console.print("[bold red]Could not retrieve anime info.[/bold red]")
         return
+    if output.mode:
+        output.emit_response(info)
+        return
 
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
     title = info.get("title", "No Title")
     description = clean_description(info.get("description"))
     
@@ -118,7 +272,15 @@ def display_anime_info(info):
     info_text.append(f"Image: ", style="bold magenta")
     info_text.append(proxy_url(info.get('image', '')), style="cyan underline")
 
-    console.print(Panel(info_text, title=f"[bold green]{title}[/bold green]", border_style="green", expand=False))
+    details = Panel(info_text, title=f"[bold green]{title}[/bold green]", border_style="green", expand=False)
+    from . import thumbnails
+    art = cover_art([info.get("image")], thumbnails.INFO_SIZE)
+    if art:
+        layout = Table.grid(padding=(0, 2))
+        layout.add_row(next(iter(art.values())), details)
+        console.print(layout)
+    else:
+        console.print(details)
     console.print(Panel(description, title="[bold]Description[/bold]", border_style="blue"))
     
     episodes = info.get("episodes", [])
@@ -144,12 +306,92 @@ def sanitize_filename(name):
     name = re.sub(r'\s+', '_', name)
     return name.strip()
 
-def download_episode(episode_id, download_type, output_path=None):
-    if M3U8Downloader is None:
-        console.print("[bold red]Download Error:[/bold red] The 'pym3u8downloader' library is not installed.")
-        console.print("Please run: [cyan]pip install pym3u8downloader[/cyan]")
+def download_errors():
+    import requests, subprocess
+    from . import hls
+    return (requests.exceptions.RequestException, hls.HLSError, subprocess.CalledProcessError, OSError)
+
+def download_progress():
+    from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
+    return Progress(
+        TextColumn("[cyan]{task.description}"), BarColumn(), TextColumn("{task.completed}/{task.total}"),
+        TextColumn("{task.fields[size]}"), TimeRemainingColumn(), console=output.rich_console(), transient=True,
+    )
+
+def download_video(stream_url, output_path, quality, progress, label="Segments"):
+    """
+    Downloads one HLS stream to output_path, reporting on a shared rich Progress.
+    Returns the number of bytes fetched, or None if no variant matches `quality`.
+    """
+    from . import hls
+    with profiler.span("hls.playlist", "download"):
+        playlist = hls.Playlist(stream_url, PROXY_URL)
+    if playlist.is_master:
+        variants = playlist.variants()
+        variant = hls.select_variant(variants, quality)
+        if variant is None:
+            console.print(f"[yellow]{label}: no video variant matches '{quality}'. Available variants:[/yellow]")
+            for i, v in enumerate(variants, 1):
+                console.print(f"#{i}. Name: {v['name'] or 'N/A'}, Bandwidth: {v['bandwidth']}, Resolution: {v['resolution'] or 'N/A'}")
+            console.print("Pick one with -q <#n|height|WxH|best|worst>, e.g. -q 720 or -q '#2'.")
+            return None
+        console.print(f"{label}: selected variant [cyan]{variant['resolution'] or 'unknown resolution'}[/cyan] ({variant['bandwidth'] // 1000} kbps)")
+        with profiler.span("hls.playlist", "download"):
+            playlist = hls.Playlist(variant["url"], PROXY_URL)
+
+    downloader = hls.SegmentDownloader(playlist, output_path)
+    task = progress.add_task(label, total=None, size="")
+    downloader.progress = lambda done, total, size: progress.update(task, completed=done, total=total, size=f"{size / 1e6:.1f} MB")
+    with profiler.span("hls.segments", "download", label=label):
+        downloader.download()
+    progress.update(task, size="joining segments...")
+    with profiler.span("hls.assemble", "subprocess"):
+        downloader.assemble()
+    progress.remove_task(task)
+    return downloader.bytes_downloaded
+
+def download_subtitles(stream_data, output_path):
+    """Saves the first subtitle track next to `output_path`. Returns why that failed, or None."""
+    import requests
+    from . import http_client
+    if not stream_data.get("subtitles"):
         return
+    sub_url = stream_data["subtitles"][0].get("url")
+    if sub_url:
+        sub_filename = os.path.splitext(output_path)[0] + ".vtt"
+        console.print(f"Downloading subtitles to [cyan]{sub_filename}[/cyan]...")
+        try:
+            proxied_sub_url = proxy_url(sub_url)
+            with profiler.span("subtitles", "download"):
+                sub_response = http_client.get(proxied_sub_url)
+                sub_response.raise_for_status()
+            with open(sub_filename, 'wb') as f:
+                f.write(sub_response.content)
+            console.print("[green]Subtitle download complete.[/green]")
+        except (requests.exceptions.RequestException, OSError) as e:
+            console.print(f"[bold red]Failed to download subtitles:[/bold red] {e}")
+            return str(e)
+    return None
+
+def fetch_subtitles(stream_data):
+    """Fetches and indexes the first subtitle track for TUI playback. Returns a SubtitleIndex or None."""
+    import requests
+    from . import http_client
+    from .subtitles import SubtitleIndex, parse_vtt
+    sub_url = (stream_data.get("subtitles") or [{}])[0].get("url")
+    if not sub_url:
+        return None
+    try:
+        with profiler.span("subtitles", "download"):
+            response = http_client.get(proxy_url(sub_url))
+            response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        console.print(f"[yellow]Playing without subtitles:[/yellow] {e}")
+        return None
+    cues = parse_vtt(response.content.decode("utf-8", errors="replace"))
+    return SubtitleIndex(cues) if cues else None
 
+def download_episode(episode_id, download_type, output_path=None, quality=DEFAULT_QUALITY):
     if not output_path:
         console.print("Auto-generating filename (requires fetching anime info)...")
         try:
@@ -173,60 +415,148 @@ def download_episode(episode_id, download_type, output_path=None):
 
     console.print(f"Preparing to download to: [green]{os.path.abspath(output_path)}[/green]")
     console.print("Fetching stream data...")
-    stream_data = make_request("watch", params={"episodeId": episode_id, "type": download_type})
+    with profiler.span("stream.resolve", "api"):
+        stream_data = make_request("watch", params={"episodeId": episode_id, "type": download_type})
 
     if not stream_data or not stream_data.get("sources"):
         console.print("[bold red]Could not retrieve stream sources for download.[/bold red]")
         return
 
-    stream_url = stream_data["sources"][0].get("url")
+    stream_url = stream_source(stream_data, quality)
     if not stream_url:
         console.print("[bold red]Incomplete stream data received.[/bold red]")
         return
     
-    proxied_stream_url = proxy_url(stream_url)
-    
     try:
-        downloader = M3U8Downloader(
-            input_file_path=proxied_stream_url,
-            output_file_path=output_path,
-        )
         console.print("Starting video download...")
-
-        try:
-            downloader.download_master_playlist(merge=True, resolution="1280x720")
-        except M3U8DownloaderWarning as warn:
-            console.print("[yellow]Multiple video variants found. Please specify one.[/yellow]")
-            variants = warn.json_data or []
-            for i, variant in enumerate(variants, 1):
-                console.print(
-                    f"{i}. Name: {variant.get('name')}, Bandwidth: {variant.get('bandwidth')}, Resolution: {variant.get('resolution')}"
-                )
-            console.print("[bold red]Please edit the script to specify the desired resolution or variant.[/bold red]")
-            return
-
+        with download_progress() as progress:
+            if download_video(stream_url, output_path, quality, progress) is None:
+                return
         console.print(f"\n[bold green]Video download complete![/bold green]")
 
-    except Exception as e:
+    except download_errors() as e:
         console.print(f"[bold red]An error occurred during video download:[/bold red] {e}")
+        console.print("Run the same command again to resume where it stopped.")
+        return
+
+    if download_type == "sub":
+        download_subtitles(stream_data, output_path)
+
+def parse_episode_range(spec, available):
+    """Turns "1-12,15" or "all" into a sorted list of episode numbers."""
+    spec = spec.strip().lower()
+    if spec == "all":
+        return sorted(available)
+    numbers = set()
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        start = int(start)
+        end = int(end) if end else start
+        if end < start:
+            raise ValueError(f"Invalid episode range '{part}'.")
+        numbers.update(range(start, end + 1))
+    return sorted(numbers)
+
+def download_episode_range(data, numbers, download_type, output_dir=None, quality=DEFAULT_QUALITY, workers=EPISODE_WORKERS):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    episodes = {int(ep["number"]): ep for ep in data["episodes"] if ep.get("number") is not None and ep.get("id")}
+    missing = [n for n in numbers if n not in episodes]
+    if missing:
+        console.print(f"[yellow]Skipping episodes not found for this anime: {', '.join(map(str, missing))}[/yellow]")
+    numbers = [n for n in numbers if n in episodes]
+    if not numbers:
+        console.print("[bold red]No matching episodes to download.[/bold red]")
+        return
+
+    output_dir = output_dir or "."
+    os.makedirs(output_dir, exist_ok=True)
+    safe_title = sanitize_filename(data.get("title", "Unknown_Anime"))
+    console.print(f"Downloading {len(numbers)} episode(s), {workers} at a time, to [green]{os.path.abspath(output_dir)}[/green]")
+
+    # Stream lookups run a few episodes ahead of the downloads, so each episode's
+    # stream data is usually ready by the time a download slot frees up.
+    lookups = ThreadPoolExecutor(max_workers=STREAM_LOOKAHEAD)
+    streams = {}
+    streams_lock = threading.Lock()
+
+    def stream_data_for(position):
+        with streams_lock:
+            for number in numbers[position:position + workers + STREAM_LOOKAHEAD]:
+                if number not in streams:
+                    params = {"episodeId": episodes[number]["id"], "type": download_type}
+                    streams[number] = lookups.submit(make_request, "watch", params, True)
+            future = streams[numbers[position]]
+        return future.result()
+
+    def download_one(position):
+        number = numbers[position]
+        output_path = os.path.join(output_dir, f"{safe_title}-Episode-{str(number).zfill(2)}-[{download_type}].mp4")
+        with profiler.span("stream.resolve", "api", episode=number):
+            stream_data = stream_data_for(position)
+        stream_url = stream_source(stream_data, quality)
+        if not stream_url:
+            return number, output_path, 0, 0, "no stream data"
+        start = time.time()
+        try:
+            fetched = download_video(stream_url, output_path, quality, progress, f"Episode {number}")
+        except download_errors() as e:
+            return number, output_path, 0, time.time() - start, f"failed: {e}"
+        if fetched is None:
+            return number, output_path, 0, time.time() - start, "no matching variant"
+        error = download_subtitles(stream_data, output_path) if download_type == "sub" else None
+        return number, output_path, fetched, time.time() - start, f"subtitles failed: {error}" if error else "ok"
+
+    try:
+        with download_progress() as progress, ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(download_one, range(len(numbers))))
+    finally:
+        lookups.shutdown(wait=False, cancel_futures=True)
+    display_download_summary(results)
+
+def display_download_summary(results):
+    from rich.markup import escape
+    from rich.table import Table
+    table = Table(title="[bold cyan]Download Summary[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Ep #", style="dim")
+    table.add_column("File", style="white")
+    table.add_column("Size", style="yellow", justify="right")
+    table.add_column("Time", style="yellow", justify="right")
+    table.add_column("Speed", style="green", justify="right")
+    table.add_column("Status")
+
+    total_bytes = total_time = 0
+    for number, output_path, fetched, elapsed, status in results:
+        total_bytes += fetched
+        total_time += elapsed
+        speed = f"{fetched / elapsed / 1e6:.2f} MB/s" if fetched and elapsed else "-"
+        table.add_row(
+            str(number), escape(os.path.basename(output_path)), f"{fetched / 1e6:.1f} MB", f"{elapsed:.1f}s", speed,
+            "[green]ok[/green]" if status == "ok" else f"[red]{status}[/red]",
+        )
+    console.print(table)
+    failed = sum(1 for result in results if result[4] != "ok")
+    console.print(f"{len(results) - failed}/{len(results)} episode(s) downloaded, {total_bytes / 1e6:.1f} MB in total.")
+    if failed:
+        console.print("Run the same command again to retry; finished segments are kept.")
+
+def get_and_download_episode(anime_id, ep_num_str, download_type, output_path=None, quality=DEFAULT_QUALITY, workers=EPISODE_WORKERS):
+    if not ep_num_str.strip().isdigit():
+        console.print(f"Fetching info for anime [cyan]{anime_id}[/cyan] to resolve episodes {ep_num_str}...")
+        data = make_request(f"info/{anime_id}")
+        if not data or not data.get("episodes"):
+            console.print(f"[bold red]Could not retrieve info or episode list for anime ID '{anime_id}'.[/bold red]")
+            return
+        available = [int(ep["number"]) for ep in data["episodes"] if ep.get("number") is not None]
+        try:
+            numbers = parse_episode_range(ep_num_str, available)
+        except ValueError:
+            console.print(f"[bold red]Error:[/bold red] Episodes must be a number, a range like '1-12,15', or 'all'. You provided '{ep_num_str}'.")
+            return
+        download_episode_range(data, numbers, download_type, output_path, quality, workers)
         return
 
-    if download_type == "sub" and stream_data.get("subtitles"):
-        sub_url = stream_data["subtitles"][0].get("url")
-        if sub_url:
-            sub_filename = os.path.splitext(output_path)[0] + ".vtt"
-            console.print(f"Downloading subtitles to [cyan]{sub_filename}[/cyan]...")
-            try:
-                proxied_sub_url = proxy_url(sub_url)
-                sub_response = requests.get(proxied_sub_url)
-                sub_response.raise_for_status()
-                with open(sub_filename, 'wb') as f:
-                    f.write(sub_response.content)
-                console.print("[green]Subtitle download complete.[/green]")
-            except requests.exceptions.RequestException as e:
-                console.print(f"[bold red]Failed to download subtitles:[/bold red] {e}")
-                
-def get_and_download_episode(anime_id, ep_num_str, download_type, output_path=None):
     try:
         episode_number = int(ep_num_str)
     except ValueError:
@@ -252,19 +582,22 @@ def get_and_download_episode(anime_id, ep_num_str, download_type, output_path=No
             safe_title = sanitize_filename(anime_title)
             output_path = f"./{safe_title}-Episode-{ep_num}-[{download_type}].mp4"
 
-        download_episode(episode_id, download_type, output_path)
+        download_episode(episode_id, download_type, output_path, quality)
     else:
         console.print(f"[bold red]Could not find episode number {episode_number} for this anime.[/bold red]")
         console.print("Use the -i <anime_id> command to see a list of available episodes.")
 
 def check_for_updates():
-    if semver is None:
+    try:
+        from packaging import version as semver
+    except ImportError:
         console.print("[yellow]Skipping update check: 'packaging' library not found. Install with 'pip install packaging'[/yellow]")
         return
+    from . import http_client
     try:
         console.print("Checking for updates...")
-        url = f"https://pypi.org/pypi/{PACKAGE_NAME}/json"
-        response = requests.get(url, timeout=5)
+        url = f"{PYPI_URL}/{PACKAGE_NAME}/json"
+        response = http_client.get(url, timeout=5)
         response.raise_for_status()
         latest_version_str = response.json()["info"]["version"]
 
@@ -279,7 +612,7 @@ def check_for_updates():
     except Exception:
         console.print("[yellow]Could not check for updates.[/yellow]")
 
-def get_and_watch_episode(anime_id, ep_num_str, watch_type):
+def get_and_watch_episode(anime_id, ep_num_str, watch_type, render_workers=0, color_mode="auto", dither=False, autoplay=False, quality=DEFAULT_QUALITY):
     try:
         episode_number = int(ep_num_str)
     except ValueError:
@@ -303,16 +636,88 @@ def get_and_watch_episode(anime_id, ep_num_str, watch_type):
     if target_episode and target_episode.get("id"):
         episode_id = target_episode["id"]
         console.print(f"Found Episode ID: [green]{episode_id}[/green]. Proceeding to watch...")
-        watch_episode(episode_id, watch_type)
+        if autoplay:
+            autoplay_episodes(data["episodes"], target_episode, watch_type, quality, render_workers, color_mode, dither)
+        else:
+            watch_episode(episode_id, watch_type, render_workers, color_mode, dither, quality=quality)
     else:
         console.print(f"[bold red]Could not find episode number {episode_number} for this anime.[/bold red]")
         console.print("Use the -i <anime_id> command to see a list of available episodes.")
 
+def prefetch_episode(episode_id, watch_type, quality, directory, stop):
+    """
+    Resolves an episode's stream and downloads the first PREFETCH_SEGMENTS
+    segments of its `quality` variant into `directory`, at most PREFETCH_RATE
+    bytes per second, after waiting PREFETCH_DELAY seconds so the episode playing
+    now can buffer first. Returns (stream data, local playlist or None).
+    """
+    import requests
+    from . import hls
+    if stop.wait(PREFETCH_DELAY):
+        return None, None
+    with profiler.span("prefetch", "download", episode=episode_id):
+        data = make_request("watch", params={"episodeId": episode_id, "type": watch_type}, quiet=True)
+        stream_url = stream_source(data, quality)
+        if not stream_url:
+            return data, None
+        try:
+            playlist = hls.Playlist(stream_url, PROXY_URL)
+            if playlist.is_master:
+                variant = hls.select_variant(playlist.variants(), quality)
+                if variant is None:
+                    return data, None
+                playlist = hls.Playlist(variant["url"], PROXY_URL)
+            os.makedirs(directory, exist_ok=True)
+            return data, hls.prefetch(playlist, directory, PREFETCH_SEGMENTS, PREFETCH_RATE, stop)
+        except (requests.exceptions.RequestException, hls.HLSError, OSError):
+            return data, None  # the episode streams from its URL as usual
+
+def autoplay_episodes(episodes, first, watch_type, quality=DEFAULT_QUALITY, render_workers=0, color_mode="auto", dither=False):
+    """
+    Watches `first` and then each following episode. While one plays, the next
+    is resolved and its opening segments prefetched on a background thread, so it
+    starts without the usual lookups and buffering. Stops after the last episode
+    or when one cannot be played.
+    """
+    import tempfile, threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    queue = sorted((ep for ep in episodes if ep.get("id") and ep.get("number") is not None), key=lambda ep: int(ep["number"]))
+    position = next(i for i, ep in enumerate(queue) if ep["id"] == first["id"])
+    root = tempfile.mkdtemp(prefix="pyanimecli-autoplay-")
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=1)
+    prefetched = None
+    try:
+        for i in range(position, len(queue)):
+            upcoming = None
+            if i + 1 < len(queue):
+                directory = os.path.join(root, str(queue[i + 1]["number"]))
+                upcoming = pool.submit(prefetch_episode, queue[i + 1]["id"], watch_type, quality, directory, stop)
+            played = watch_episode(queue[i]["id"], watch_type, render_workers, color_mode, dither, prefetched, quality)
+            shutil.rmtree(os.path.join(root, str(queue[i]["number"])), ignore_errors=True)
+            if not played or upcoming is None:
+                break
+            if not upcoming.done():
+                stop.set()  # the episode ended before the prefetch did; use what has arrived
+            prefetched = upcoming.result()
+            stop.clear()
+            console.print(f"[bold]Autoplay:[/bold] episode {queue[i + 1]['number']} ({'prefetched' if prefetched[1] else 'streaming'})")
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+        shutil.rmtree(root, ignore_errors=True)
+
 def display_spotlight(spotlight_data):
+    if output.mode:
+        output.emit_response(spotlight_data, spotlight_data or [])
+        return
     if not spotlight_data:
         console.print("[yellow]No spotlight data found.[/yellow]")
         return
-    
+
+    from rich.panel import Panel
+    from rich.text import Text
     console.print("[bold yellow]🌟 Spotlight 🌟[/bold yellow]")
     for item in spotlight_data:
         rank = item.get("other_data", {}).get("rank", "")
@@ -334,10 +739,14 @@ def display_spotlight(spotlight_data):
         ))
 
 def display_schedule(schedule_data, date):
+    if output.mode:
+        output.emit_response(schedule_data, schedule_data or [])
+        return
     if not schedule_data:
         console.print(f"[yellow]No schedule found for {date}.[/yellow]")
         return
-    
+
+    from rich.table import Table
     table = Table(title=f"[bold cyan]Airing Schedule for {date}[/bold cyan]", show_header=True, header_style="bold magenta")
     table.add_column("Time (UTC)", style="yellow")
     table.add_column("Title", style="bold white")
@@ -355,10 +764,14 @@ def display_schedule(schedule_data, date):
     console.print(table)
 
 def display_suggestions(suggestions_data):
+    if output.mode:
+        output.emit_response(suggestions_data, suggestions_data or [])
+        return
     if not suggestions_data:
         console.print("[yellow]No suggestions found.[/yellow]")
         return
 
+    from rich.table import Table
     table = Table(title="[bold cyan]Search Suggestions[/bold cyan]", show_header=True, header_style="bold magenta")
     table.add_column("Title", style="bold white")
     table.add_column("Alias", style="dim")
@@ -375,11 +788,73 @@ def display_suggestions(suggestions_data):
         )
     console.print(table)
     
-def search_anime(query, page):
+def search_anime(query, page, offline=False):
+    if offline:
+        search_offline(query, page)
+        return
     endpoint = f"search/{quote(query)}"
-    data = make_request(endpoint, params={"page": page, "max_results": 10})
-    if data:
-        display_search_results(data)
+    fetch_listing(endpoint, {"max_results": 10}, page, "Search Results")
+
+def offline_matches(query, limit):
+    """Ranked matches from the local index, or None (after saying why) when there is none or SQLite cannot read it."""
+    from . import catalog
+    try:
+        matches = catalog.search(query, limit)
+    except catalog.CatalogError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return None
+    if matches is None:
+        console.print("[bold red]No local index yet.[/bold red] Build it with: [cyan]pyanimecli index build[/cyan]")
+    return matches
+
+def search_offline(query, page_spec):
+    """-s --offline: matches from the local index, OFFLINE_PAGE_SIZE to a page."""
+    try:
+        first, last = parse_page_range(page_spec)
+    except ValueError as e:
+        console.print(f"[bold red]Invalid page:[/bold red] {e} Use a number, a range such as 1-5, or 'all'.")
+        return
+    start = time.perf_counter()
+    matches = offline_matches(query, OFFLINE_RESULTS)
+    if matches is None:
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    if result_rows is not None:
+        result_rows.clear()
+    total_pages = max(1, -(-len(matches) // OFFLINE_PAGE_SIZE))
+    last = total_pages if last is None else min(last, total_pages)
+    display_search_results({
+        "current_page": first, "total_pages": total_pages, "has_next_page": last < total_pages,
+        "results": matches[(first - 1) * OFFLINE_PAGE_SIZE:last * OFFLINE_PAGE_SIZE],
+    }, title="Offline Search Results")
+    console.print(f"[dim]{len(matches)} match(es) from the local index in {elapsed:.1f} ms.[/dim]")
+
+def update_index(args_list):
+    """index build|update [studio_id ...]: crawls listings into the local search index."""
+    from . import catalog
+    action, studios = args_list[0].lower(), args_list[1:]
+    if action not in ("build", "update"):
+        console.print("[bold red]Invalid Usage:[/bold red] Use: index build [studio_id ...] | index update")
+        display_help("index")
+        return
+    try:
+        with console.status("Crawling the catalog...", spinner="dots") as status:
+            def progress(pages, titles):
+                if status is not None:
+                    status.update(f"Crawling the catalog: {pages} pages, {titles} titles...")
+            result = catalog.crawl(BASE_URL, studios, update=action == "update", progress=progress)
+    except catalog.CatalogError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return
+    if output.mode:
+        output.emit([result])
+    else:
+        console.print(
+            f"Indexed [bold]{result['titles']}[/bold] titles ({result['changed']} new or changed) from {result['pages']} pages "
+            f"in {result['seconds']:.1f}s into [cyan]{catalog.index_path()}[/cyan]."
+        )
+    if result["failed"]:
+        console.print(f"[yellow]Could not fetch: {', '.join(result['failed'])}. Run 'pyanimecli index update' to retry.[/yellow]")
 
 def get_anime_info(anime_id):
     endpoint = f"info/{anime_id}"
@@ -387,7 +862,24 @@ def get_anime_info(anime_id):
     if data:
         display_anime_info(data)
 
-def watch_episode(episode_id, watch_type):
+def print_encoder_stats(encoder):
+    if not encoder.frames:
+        return
+    total = encoder.bytes_written + encoder.bytes_saved
+    saved_pct = 100 * encoder.bytes_saved / total if total else 0
+    console.print(
+        f"\n[dim]Delta rendering, {encoder.mode} colors{' dithered' if encoder.dither else ''}: {encoder.frames} frames ({encoder.full_frames} full), "
+        f"{encoder.bytes_written / 1e6:.1f} MB written ({encoder.bytes_written / encoder.frames / 1e3:.1f} KB/frame), {encoder.bytes_saved / 1e6:.1f} MB saved "
+        f"({saved_pct:.0f}%, {encoder.bytes_saved / encoder.frames / 1e3:.1f} KB/frame)[/dim]"
+    )
+
+def watch_episode(episode_id, watch_type, render_workers=0, color_mode="auto", dither=False, prefetched=None, quality=DEFAULT_QUALITY):
+    """
+    Plays an episode. `prefetched` is (stream data, local playlist or None) from
+    prefetch_episode, which skips the stream lookup. `quality` is the variant
+    sources are probed with. Returns True once playback has run to the end.
+    """
+    import platform, subprocess, tempfile
     STREAM_MODE = "tui"
     if STREAM_MODE == "vlc":
         if not check_executable("vlc"):
@@ -403,13 +895,13 @@ def watch_episode(episode_id, watch_type):
 
         endpoint = "watch"
         params = {"episodeId": episode_id, "type": watch_type}
-        data = make_request(endpoint, params=params)
+        data = prefetched[0] if prefetched and prefetched[0] else make_request(endpoint, params=params)
 
         if not data or not data.get("sources"):
             console.print("[bold red]Could not retrieve stream sources.[/bold red]")
             return
 
-        stream_url = data["sources"][0].get("url")
+        stream_url = stream_source(data, quality)
         referrer = data["headers"].get("Referer")
         
         if not stream_url or not referrer:
@@ -448,6 +940,7 @@ def watch_episode(episode_id, watch_type):
 
         try:
             subprocess.run(vlc_command)
+            return True
         except Exception as e:
             console.print(f"[bold red]Failed to launch VLC:[/bold red] {e}")
         finally:
@@ -456,13 +949,18 @@ def watch_episode(episode_id, watch_type):
     else:
         endpoint = "watch"
         params = {"episodeId": episode_id, "type": watch_type}
-        data = make_request(endpoint, params=params)
+        local_playlist = None
+        if prefetched and prefetched[0]:
+            data, local_playlist = prefetched
+        else:
+            with profiler.span("stream.resolve", "api"):
+                data = make_request(endpoint, params=params)
 
         if not data or not data.get("sources"):
             console.print("[bold red]Could not retrieve stream sources.[/bold red]")
             return
 
-        stream_url = data["sources"][0].get("url")
+        stream_url = stream_source(data, quality)
         referrer = data["headers"].get("Referer")
         
         if not stream_url or not referrer:
@@ -470,105 +968,89 @@ def watch_episode(episode_id, watch_type):
             return
         
         proxied_stream_url = proxy_url(stream_url)
-        
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".mp4") as tmp_file:
-            cmd = ["ffmpeg", "-y", "-i", proxied_stream_url, "-c", "copy", tmp_file.name]
-            subprocess.run(cmd)
-            
-            from .tui import render_frame
-
-            import subprocess as sp
-            from moviepy.editor import VideoFileClip
-            from threading import Thread
-            import sys, shutil
-            import cv2
-            import time
 
-            clip = VideoFileClip(tmp_file.name)
+        for tool in ("ffmpeg", "ffplay"):
+            if not check_executable(tool):
+                console.print(f"[bold red]{tool} not found.[/bold red] Please install ffmpeg and ensure it's in your system's PATH.")
+                return
 
-            clip = clip.set_fps(2)
-
-            width, height = shutil.get_terminal_size()
-            height -= 1
-            width -= 1
-            size = (width, height * 2)
-
-            clip = clip.resize(size)
-
-            BUFSIZE = 20
-
-            def audio():
-                return sp.run(["ffplay", "-vn", "-nodisp", tmp_file.name], stdout=sp.DEVNULL, stderr=sp.DEVNULL)
-
-            processed = []
-
-            def process():
-                for frame in clip.iter_frames():
-                    f = render_frame(frame)
-                    processed.append(f)
-
-            a_thread = Thread(target = audio  )
-            p_thread = Thread(target = process)
-
-            p_thread.start()
-
-
-
-            fps = clip.fps
-            frame_time = 1.0 / fps
-
-            while len(processed) < BUFSIZE:
-                time.sleep(0.01)
-
-            a_thread.start()
-
-            while True:
-                while len(processed) < BUFSIZE:
-                    if not p_thread.is_alive():
-                        break
-                    time.sleep(0.01)
-
-                while len(processed) >= BUFSIZE:
-                    frame = processed.pop(0)
-                    start = time.time()
-                    sys.stdout.write(frame)
-                    sys.stdout.flush()
-                    elapsed = time.time() - start
-                    sleep_time = max(0, frame_time - elapsed)
-                    time.sleep(sleep_time)
+        try:
+            from .tui import FrameEncoder, detect_color_mode, stream_frames
+            from .player import AudioClock, play
+        except ImportError as e:
+            console.print(f"[bold red]Terminal playback needs NumPy:[/bold red] {e}")
+            console.print("Please run: [cyan]pip install pyanimecli[tui][/cyan]")
+            return
 
-                if not p_thread.is_alive() and not processed:
-                    break
+        width, height = shutil.get_terminal_size()
+        height -= 1
+        width -= 1
+
+        source, input_options = proxied_stream_url, ()
+        if local_playlist:
+            from .hls import LOCAL_PLAYLIST_OPTIONS
+            source, input_options = local_playlist, LOCAL_PLAYLIST_OPTIONS
+
+        # ffmpeg decodes, scales and drops to TUI_FPS itself; ffplay's audio position drives presentation.
+        # On POSIX, that ffmpeg also pipes the audio on to ffplay, so the stream is downloaded once;
+        # elsewhere ffplay reads the source itself.
+        audio_read, audio_write = os.pipe() if os.name != "nt" else (None, None)
+        frames = stream_frames(source, width, height * 2, TUI_FPS, input_options, audio_write)
+        if audio_read is None:
+            clock = AudioClock(source, input_options)
+        else:
+            clock = AudioClock("pipe:0", stdin_fd=audio_read)
+        mode = detect_color_mode() if color_mode == "auto" else color_mode
+        if dither and mode == "truecolor":
+            console.print("[yellow]--dither only applies to the 256- and 16-color modes; ignoring it for truecolor.[/yellow]")
+            dither = False
+        encoder = FrameEncoder(mode, dither)
+        overlay = None
+        if watch_type == "sub":
+            index = fetch_subtitles(data)
+            if index:
+                from .subtitles import SubtitleOverlay
+                overlay = SubtitleOverlay(index, width, height, mode)
+        pool = None
+        if render_workers:
+            from .pool import RenderPool
+            pool = RenderPool(render_workers, mode, dither)
+        try:
+            with profiler.span("playback", "render"):
+                stats = play(frames, TUI_FPS, clock, encoder, pool=pool, overlay=overlay)
+        finally:
+            clock.stop()
+            if pool:
+                pool.close()
 
-            os.remove(tmp_file.name)
+        print_encoder_stats(encoder)
+        console.print(f"[dim]Playback: {stats.presented} frames shown, {stats.dropped} dropped, {stats.late} late, {stats.mean_buffered:.1f} buffered on average.[/dim]")
+        if not stats.presented:
+            console.print("[bold red]No frames could be decoded from the stream.[/bold red]")
+        return stats.presented > 0
 
 
 def get_recent_episodes(page):
-    data = make_request("recent-episodes", params={"page": page})
-    if data:
-        display_search_results(data, title="Recently Updated Episodes")
+    fetch_listing("recent-episodes", {}, page, "Recently Updated Episodes")
 
 def get_top_airing(page):
-    data = make_request("top-airing", params={"page": page})
-    if data:
-        display_search_results(data, title="Top Airing Anime")
+    fetch_listing("top-airing", {}, page, "Top Airing Anime")
 
 def list_genres():
     data = make_request("genre/list")
-    if data:
+    if output.mode and data is not None:
+        output.emit_response(data, data)
+    elif data:
+        from rich.panel import Panel
         console.print(Panel(", ".join(data), title="[bold cyan]Available Genres[/bold cyan]", border_style="cyan"))
 
 def search_by_genre(genre, page):
     endpoint = f"genre/{quote(genre)}"
-    data = make_request(endpoint, params={"page": page})
-    if data:
-        display_search_results(data, title=f"Results for Genre: {genre.capitalize()}")
+    fetch_listing(endpoint, {}, page, f"Results for Genre: {genre.capitalize()}")
 
 def search_by_studio(studio_id, page):
     endpoint = f"studio/{quote(studio_id)}"
-    data = make_request(endpoint, params={"page": page})
-    if data:
-        display_search_results(data, title=f"Results for Studio: {studio_id}")
+    fetch_listing(endpoint, {}, page, f"Results for Studio: {studio_id}")
 
 def get_schedule(date):
     endpoint = f"schedule/{date}"
@@ -581,20 +1063,78 @@ def get_spotlight():
     if data:
         display_spotlight(data)
 
-def get_search_suggestions(query):
+def suggestion_items(matches):
+    """Local index matches shaped like search-suggestions items."""
+    return [{"id": m["id"], "title": m["title"], "other_data": {"alias": m["alias"] or "N/A"}} for m in matches]
+
+def get_search_suggestions(query, offline=False):
+    if offline:
+        matches = offline_matches(query, OFFLINE_SUGGESTIONS)
+        if matches is not None:
+            display_suggestions(suggestion_items(matches))
+        return
     endpoint = f"search-suggestions/{quote(query)}"
     data = make_request(endpoint)
     if data:
         display_suggestions(data)
 
+def suggest_as_you_type(offline=False):
+    """-ss without a query: suggestions update as you type, and Enter shows the picked anime's info."""
+    from . import suggest
+    if not sys.stdin.isatty() or not sys.stdout.isatty():
+        console.print("[bold red]Suggestions as you type need an interactive terminal.[/bold red] Use: -ss <query>")
+        return
+    if offline:
+        from . import catalog
+        if offline_matches("", 1) is None:
+            return
+
+        def fetch(query):
+            matches = catalog.search(query, OFFLINE_SUGGESTIONS) or []
+            return suggestion_items(matches), len(matches) < OFFLINE_SUGGESTIONS
+    else:
+        fetch = suggest.api_fetcher(BASE_URL)
+    picked = suggest.prompt(fetch)
+    if picked and picked.get("id"):
+        get_anime_info(picked["id"])
+
+def display_network_stats():
+    from . import http_client
+    totals, hosts = http_client.connection_stats()
+    console.print(
+        f"[dim]Network: {totals['requests']} requests, {totals['coalesced']} coalesced, "
+        f"{totals['retries']} retries.[/dim]"
+    )
+    for host, requests_sent, connections in hosts:
+        console.print(f"[dim]  {host}: {requests_sent} requests over {connections} connection(s), {max(0, requests_sent - connections)} reused.[/dim]")
+
+def display_profile(path):
+    profiler.write_trace(path)
+    if output.mode:
+        for name, calls, total, mean, longest in profiler.summary():
+            console.print(f"{name}: {calls} calls, {total:.1f} ms total, {mean:.2f} ms mean, {longest:.1f} ms max")
+        console.print(f"Trace written to {os.path.abspath(path)}.")
+        return
+    from rich.table import Table
+    table = Table(title="[bold cyan]Profile[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Phase", style="bold white")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right", style="yellow")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    for name, calls, total, mean, longest in profiler.summary():
+        table.add_row(name, str(calls), f"{total:.1f}", f"{mean:.2f}", f"{longest:.1f}")
+    console.print(table)
+    console.print(f"[dim]Spans nest, so totals overlap. Trace written to {os.path.abspath(path)} (open in chrome://tracing or ui.perfetto.dev).[/dim]")
+
 def display_help(command=None):
-    console.print(Panel(f"[bold yellow]pyanimecli v{__version__} - A CLI for Watching & Downloading Anime[/bold yellow]", expand=False, border_style="yellow"))
-    
     help_data = {
         "search": ("-s, -search <query>", "Search for an anime."),
         "info": ("-i, -info <id>", "Get detailed information about an anime by its ID."),
         "watch": ("-w, -watch <id> <ep#> <type> | <ep_id> <type>", "Watch an episode using VLC."),
-        "download": ("-d, -download <id> <ep#> <type> [out] | <ep_id> <type> [out]", "Download an episode. '[out]' is an optional file path."),
+        "download": ("-d, -download <id> <ep#|1-12,15|all> <type> [out] | <ep_id> <type> [out]", "Download episodes. '[out]' is a file path, or a folder for ranges. Interrupted downloads resume."),
+        "parallel_downloads": ("-pd, -parallel-downloads <n>", f"Episodes to download at once for ranges (default {EPISODE_WORKERS})."),
+        "quality": ("-q, -quality <best|worst|height|WxH|#n>", f"Video variant to download (default {DEFAULT_QUALITY})."),
         "recent": ("-re, -recent-episodes", "List recently updated episodes."),
         "top_airing": ("-ta, -top-airing", "List top airing anime."),
         "genres": ("-g, -genres", "List all available genres."),
@@ -602,11 +1142,31 @@ def display_help(command=None):
         "studio": ("-st, -studio <studio_id>", "Search for anime by a studio ID."),
         "schedule": ("-sc, -schedule <YYYY-MM-DD>", "Get the airing schedule for a specific date."),
         "spotlight": ("-sp, -spotlight", "Show spotlight anime."),
-        "suggestions": ("-ss, -search-suggestions <query>", "Get search suggestions for a query."),
-        "pagination": ("-p, -page <number>", "Used with commands that support pages (search, recent, etc.)."),
+        "suggestions": ("-ss, -search-suggestions <query> | -ss", "Get search suggestions for a query. Without one, suggestions update as you type (Up/Down to pick, Enter for info, Esc to quit); narrowing a query already answered is filtered locally instead of fetched again."),
+        "pagination": ("-p, -page <n|start-end|all>", "Page, or range of pages fetched concurrently, for search, recent, top airing, genre and studio listings."),
+        "autoplay": ("-w <id> <ep#> <type> -ap, -autoplay", f"Keep playing the following episodes. Each is resolved and its first {PREFETCH_SEGMENTS} segments of the -q variant prefetched (at most {PREFETCH_RATE // 1000} KB/s) while the previous one plays."),
+        "render_workers": ("-rw, -render-workers <n>", "Render terminal video on n worker processes when watching (0 = single process)."),
+        "color_mode": ("-cm, -color-mode <auto|truecolor|256|16> [--dither]", "Terminal video color depth; auto reads COLORTERM/TERM. Fewer colors send far fewer bytes over SSH or tmux."),
+        "thumbnails": ("-th, -thumbnails", "Show cover art in info and listing views (needs the tui extra). Images and rendered art are cached on disk."),
+        "local_proxy": ("-lp, -local-proxy", "Fetch streams through a proxy on this machine instead of the remote one: no extra hop, and segments and subtitles are cached on disk (1 GB) so replays and resumed downloads are served locally."),
+        "cache": ("--no-cache | --refresh", "Skip the local response cache, or bypass it and store fresh responses."),
+        "network": ("--connect-timeout <s> --read-timeout <s> --verbose", "Network timeouts; --verbose prints request and connection reuse stats. When an episode has several stream sources, their CDNs are probed concurrently and the fastest is used; results are remembered per host for 6 hours (--refresh probes again)."),
+        "profile": ("--profile [trace.json]", "Time API calls, downloads, subprocesses and rendering; write a Chrome trace and print a summary."),
+        "index": ("index build [studio_id ...] | index update", "Crawl the genre, top airing, recent and studio listings, a few requests per second, into a local search index. Update only walks each listing until a page brings nothing new, and re-crawls studios given to earlier builds."),
+        "offline": ("-s, -ss <query> --offline", f"Search the local index instead of the API: ranked, typo-tolerant matches in milliseconds, {OFFLINE_PAGE_SIZE} per page."),
+        "output": ("--json | --ndjson", "Print results as JSON instead of tables, without loading rich: --json writes each response as one line, --ndjson one line per item of a listing. Records are written as they arrive; messages go to stderr. For lookup commands, not -w or -d."),
+        "shell": ("shell | -sh, -shell", "Interactive shell in one warm process: cached responses and connections stay open, rows are picked by number (i 3, w 3 1 sub), and each command shows its latency."),
         "version": ("-v, -version", "Show the script version and check for updates.")
     }
 
+    if output.mode:
+        records = [{"command": key, "usage": usage, "description": desc} for key, (usage, desc) in help_data.items() if command in (None, key)]
+        output.emit_response(records, records)
+        return
+
+    from rich.panel import Panel
+    from rich.table import Table
+    console.print(Panel(f"[bold yellow]pyanimecli v{__version__} - A CLI for Watching & Downloading Anime[/bold yellow]", expand=False, border_style="yellow"))
     if command and command in help_data:
         usage, desc = help_data[command]
         console.print(f"\n[bold]Help for '{command}':[/bold]")
@@ -621,7 +1181,7 @@ def display_help(command=None):
         console.print(table)
         console.print("\nUse -h <command_name> (e.g., -h download) for specific command help.")
         
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description=f"pyanimecli v{__version__} - A CLI for anime.", add_help=False)
     
     group = parser.add_mutually_exclusive_group()
@@ -636,98 +1196,181 @@ def main():
     group.add_argument('-st', '-studio', dest='studio', nargs='+', help='Search by studio.')
     group.add_argument('-sc', '-schedule', dest='schedule', help='Get schedule for a date (YYYY-MM-DD).')
     group.add_argument('-sp', '-spotlight', dest='spotlight', action='store_true', help='Get spotlight anime.')
-    group.add_argument('-ss', '-search-suggestions', dest='suggestions', nargs='+', help='Get search suggestions.')
+    group.add_argument('-ss', '-search-suggestions', dest='suggestions', nargs='*', help='Get search suggestions; without a query, suggest as you type.')
     group.add_argument('-h', '-help', dest='help', nargs='?', const='all', help='Show help message.')
     group.add_argument('-v', '-version', dest='version', action='store_true', help='Show script version.')
+    group.add_argument('-sh', '-shell', dest='shell', action='store_true', help='Start an interactive shell.')
+    group.add_argument('-ix', '-index', dest='index', nargs='+', metavar=('ACTION', 'STUDIO'), help='Build or update the local search index. See -h index.')
+
+    parser.add_argument('-p', '-page', dest='page', default="1", help='Page number, range (1-5) or "all" for paginated results.')
+    parser.add_argument('-q', '-quality', dest='quality', default=DEFAULT_QUALITY, help='Video variant to download.')
+    parser.add_argument('-pd', '-parallel-downloads', dest='parallel_downloads', type=int, default=EPISODE_WORKERS, help='Episodes to download at once.')
+    parser.add_argument('-ap', '-autoplay', dest='autoplay', action='store_true', help='Keep playing the following episodes.')
+    parser.add_argument('-rw', '-render-workers', dest='render_workers', type=int, default=0, help='Worker processes for terminal video rendering.')
+    parser.add_argument('-cm', '-color-mode', dest='color_mode', default='auto', choices=['auto', 'truecolor', '256', '16'], help='Color depth for terminal video.')
+    parser.add_argument('--dither', dest='dither', action='store_true', help='Ordered dithering for the 256- and 16-color modes.')
+    parser.add_argument('-th', '-thumbnails', dest='thumbnails', action='store_true', help='Show cover art in info and listing views.')
+    parser.add_argument('-lp', '-local-proxy', dest='local_proxy', action='store_true', help='Stream through a local caching proxy.')
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true', help='Do not read or write the response cache.')
+    parser.add_argument('--refresh', dest='refresh', action='store_true', help='Ignore cached responses and fetch fresh data.')
+    parser.add_argument('--connect-timeout', dest='connect_timeout', type=float, help='Seconds to wait for a connection (default 5).')
+    parser.add_argument('--read-timeout', dest='read_timeout', type=float, help='Seconds to wait for response data (default 30).')
+    parser.add_argument('--verbose', dest='verbose', action='store_true', help='Show network statistics on exit.')
+    parser.add_argument('--offline', dest='offline', action='store_true', help='Answer -s and -ss from the local search index.')
+    parser.add_argument('--json', dest='output_mode', action='store_const', const='json', help='Print each response as one line of JSON.')
+    parser.add_argument('--ndjson', dest='output_mode', action='store_const', const='ndjson', help='Print one line of JSON per listed item.')
+    parser.add_argument('--profile', dest='profile', nargs='?', const='pyanimecli-trace.json', help='Write a Chrome trace of timed phases on exit.')
+    return parser
+
+def apply_options(args):
+    """Sets the module-level switches (cache, profiling, thumbnails, timeouts, proxy, output) from parsed arguments."""
+    global PROXY_URL
+    if args.output_mode:
+        output.mode = args.output_mode
+    if args.no_cache or args.refresh:
+        from . import cache as response_cache
+        response_cache.enabled = not args.no_cache
+        response_cache.refresh = args.refresh
+    if args.profile:
+        profiler.enabled = True
+    if args.thumbnails:
+        from . import thumbnails
+        thumbnails.enabled = True
+    if args.connect_timeout or args.read_timeout:
+        from . import http_client
+        http_client.configure(args.connect_timeout, args.read_timeout)
+    if args.local_proxy:
+        from . import local_proxy
+        PROXY_URL = local_proxy.start()
+
+def run_command(args):
+    """Runs the command selected by parsed arguments. Used by main() and by the shell for every line."""
+    if args.help:
+        cmd_map = {
+            "search": "search", "s": "search", "info": "info", "i": "info",
+            "watch": "watch", "w": "watch", "download": "download", "d": "download",
+            "recent": "recent", "re": "recent", "recent-episodes": "recent",
+            "top": "top_airing", "ta": "top_airing", "top-airing": "top_airing",
+            "genres": "genres", "g": "genres", "genre-search": "genre_search", "gs": "genre_search",
+            "studio": "studio", "st": "studio", "schedule": "schedule", "sc": "schedule",
+            "spotlight": "spotlight", "sp": "spotlight",
+            "suggestions": "suggestions", "ss": "suggestions", "search-suggestions": "suggestions",
+            "page": "pagination", "p": "pagination", "version": "version", "v": "version",
+            "autoplay": "autoplay", "ap": "autoplay",
+            "render-workers": "render_workers", "rw": "render_workers",
+            "color-mode": "color_mode", "cm": "color_mode", "dither": "color_mode",
+            "quality": "quality", "q": "quality",
+            "parallel-downloads": "parallel_downloads", "pd": "parallel_downloads",
+            "thumbnails": "thumbnails", "th": "thumbnails",
+            "local-proxy": "local_proxy", "lp": "local_proxy",
+            "cache": "cache", "no-cache": "cache", "refresh": "cache",
+            "network": "network", "verbose": "network", "timeout": "network",
+            "profile": "profile", "shell": "shell", "sh": "shell",
+            "output": "output", "json": "output", "ndjson": "output",
+            "index": "index", "ix": "index", "offline": "offline",
+        }
+        command_to_help = cmd_map.get(args.help) if args.help != 'all' else None
+        display_help(command_to_help)
+    elif output.mode and (args.watch or args.download or args.suggestions == []):
+        console.print("[bold red]--json and --ndjson apply to lookup commands, not -w, -d or -ss without a query.[/bold red]")
+    elif args.version:
+        if output.mode:
+            output.emit([{"version": __version__}])
+        else:
+            console.print(f"pyanimecli version [bold cyan]{__version__}[/bold cyan]")
+        check_for_updates()
+    elif args.search:
+        search_anime(' '.join(args.search), args.page, args.offline)
+    elif args.info:
+        get_anime_info(args.info)
+    elif args.watch:
+        first_arg = args.watch[0]
+        if "$episode$" in first_arg:
+            if len(args.watch) == 2:
+                if args.autoplay:
+                    console.print("[yellow]-autoplay needs <anime_id> <ep#> <type>; playing this episode only.[/yellow]")
+                watch_episode(args.watch[0], args.watch[1].lower(), args.render_workers, args.color_mode, args.dither, quality=args.quality)
+            else:
+                console.print("[bold red]Invalid Usage:[/bold red] Use: <episode_id> <sub|dub>")
+                display_help('watch')
+        else:
+            if len(args.watch) == 3:
+                get_and_watch_episode(args.watch[0], args.watch[1], args.watch[2].lower(), args.render_workers, args.color_mode, args.dither, args.autoplay, args.quality)
+            else:
+                console.print("[bold red]Invalid Usage:[/bold red] Use: <anime_id> <ep_num> <sub|dub>")
+                display_help('watch')
+    elif args.download:
+        args_list = args.download
+        first_arg = args_list[0]
+        is_full_id = "$episode$" in first_arg
+        if is_full_id:
+            if len(args_list) not in [2, 3]:
+                console.print("[bold red]Invalid Usage:[/bold red] Use: <episode_id> <type> [output_path]")
+                display_help('download')
+                return
+            episode_id, dl_type = args_list[0], args_list[1]
+            output_path = args_list[2] if len(args_list) == 3 else None
+            download_episode(episode_id, dl_type.lower(), output_path, args.quality)
+        else:
+            if len(args_list) not in [3, 4]:
+                console.print("[bold red]Invalid Usage:[/bold red] Use: <anime_id> <ep_num> <type> [output_path]")
+                display_help('download')
+                return
+            anime_id, ep_num_str, dl_type = args_list[0], args_list[1], args_list[2]
+            output_path = args_list[3] if len(args_list) == 4 else None
+            get_and_download_episode(anime_id, ep_num_str, dl_type.lower(), output_path, args.quality, max(1, args.parallel_downloads))
+    elif args.recent:
+        get_recent_episodes(args.page)
+    elif args.top_airing:
+        get_top_airing(args.page)
+    elif args.genres:
+        list_genres()
+    elif args.genre_search:
+        search_by_genre(' '.join(args.genre_search), args.page)
+    elif args.studio:
+        search_by_studio(' '.join(args.studio), args.page)
+    elif args.schedule:
+        get_schedule(args.schedule)
+    elif args.spotlight:
+        get_spotlight()
+    elif args.suggestions:
+        get_search_suggestions(' '.join(args.suggestions), args.offline)
+    elif args.suggestions == []:
+        suggest_as_you_type(args.offline)
+    elif args.index:
+        update_index(args.index)
+    else:
+        display_help()
 
-    parser.add_argument('-p', '-page', dest='page', type=int, default=1, help='Page number for paginated results.')
+def main():
+    parser = build_parser()
 
     if len(sys.argv) == 1:
         display_help()
         sys.exit(0)
 
+    argv = sys.argv[1:]
+    if argv[0] in ("shell", "index"):
+        argv[0] = "-" + argv[0]
+    args = None
     try:
-        args = parser.parse_args()
-        
-        if args.help:
-            cmd_map = {
-                "search": "search", "s": "search", "info": "info", "i": "info",
-                "watch": "watch", "w": "watch", "download": "download", "d": "download",
-                "recent": "recent", "re": "recent", "recent-episodes": "recent",
-                "top": "top_airing", "ta": "top_airing", "top-airing": "top_airing",
-                "genres": "genres", "g": "genres", "genre-search": "genre_search", "gs": "genre_search",
-                "studio": "studio", "st": "studio", "schedule": "schedule", "sc": "schedule",
-                "spotlight": "spotlight", "sp": "spotlight",
-                "suggestions": "suggestions", "ss": "suggestions", "search-suggestions": "suggestions",
-                "page": "pagination", "p": "pagination", "version": "version", "v": "version",
-            }
-            command_to_help = cmd_map.get(args.help) if args.help != 'all' else None
-            display_help(command_to_help)
-        elif args.version:
-            console.print(f"pyanimecli version [bold cyan]{__version__}[/bold cyan]")
-            check_for_updates()
-        elif args.search:
-            search_anime(' '.join(args.search), args.page)
-        elif args.info:
-            get_anime_info(args.info)
-        elif args.watch:
-            first_arg = args.watch[0]
-            if "$episode$" in first_arg:
-                if len(args.watch) == 2:
-                    watch_episode(args.watch[0], args.watch[1].lower())
-                else:
-                    console.print("[bold red]Invalid Usage:[/bold red] Use: <episode_id> <sub|dub>")
-                    display_help('watch')
-            else:
-                if len(args.watch) == 3:
-                    get_and_watch_episode(args.watch[0], args.watch[1], args.watch[2].lower())
-                else:
-                    console.print("[bold red]Invalid Usage:[/bold red] Use: <anime_id> <ep_num> <sub|dub>")
-                    display_help('watch')
-        elif args.download:
-            args_list = args.download
-            first_arg = args_list[0]
-            is_full_id = "$episode$" in first_arg
-            if is_full_id:
-                if len(args_list) not in [2, 3]:
-                    console.print("[bold red]Invalid Usage:[/bold red] Use: <episode_id> <type> [output_path]")
-                    display_help('download')
-                    return
-                episode_id, dl_type = args_list[0], args_list[1]
-                output_path = args_list[2] if len(args_list) == 3 else None
-                download_episode(episode_id, dl_type.lower(), output_path)
-            else:
-                if len(args_list) not in [3, 4]:
-                    console.print("[bold red]Invalid Usage:[/bold red] Use: <anime_id> <ep_num> <type> [output_path]")
-                    display_help('download')
-                    return
-                anime_id, ep_num_str, dl_type = args_list[0], args_list[1], args_list[2]
-                output_path = args_list[3] if len(args_list) == 4 else None
-                get_and_download_episode(anime_id, ep_num_str, dl_type.lower(), output_path)
-        elif args.recent:
-            get_recent_episodes(args.page)
-        elif args.top_airing:
-            get_top_airing(args.page)
-        elif args.genres:
-            list_genres()
-        elif args.genre_search:
-            search_by_genre(' '.join(args.genre_search), args.page)
-        elif args.studio:
-            search_by_studio(' '.join(args.studio), args.page)
-        elif args.schedule:
-            get_schedule(args.schedule)
-        elif args.spotlight:
-            get_spotlight()
-        elif args.suggestions:
-            get_search_suggestions(' '.join(args.suggestions))
+        args = parser.parse_args(argv)
+        apply_options(args)
+        if args.shell:
+            from .shell import run_shell
+            run_shell(parser, argv)
         else:
-             display_help()
-
+            run_command(args)
     except argparse.ArgumentError as e:
         console.print(f"[bold red]Argument Error:[/bold red] {e}")
         display_help()
     except Exception as e:
         console.print(f"[bold red]An unexpected error occurred:[/bold red] {e}")
+    finally:
+        if args is not None and args.verbose:
+            display_network_stats()
+        if args is not None and args.profile and not args.shell:
+            display_profile(args.profile)
         
 if __name__ == "__main__":
     try:
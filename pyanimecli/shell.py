@@ -0,0 +1,132 @@
+import os, time, shlex
+
+from . import pyanimecli as cli
+from . import cache, http_client, output, profiler, thumbnails
+
+PROMPT = "pyanimecli> "
+HISTORY_FILE = "shell_history"
+HISTORY_LENGTH = 1000
+EXIT_WORDS = ("exit", "quit")
+ROW_COMMANDS = ("-i", "-info", "-w", "-watch", "-d", "-download")
+
+
+def tokenize(line):
+    """Splits a line into CLI arguments; the command may omit its dash ("s naruto" is "-s naruto")."""
+    tokens = shlex.split(line)
+    if tokens and not tokens[0].startswith("-"):
+        tokens[0] = "-" + tokens[0]
+    return tokens
+
+
+def resolve_rows(tokens):
+    """Replaces a row number after -i, -w or -d with the ID shown on that row of the last listing."""
+    if len(tokens) < 2 or tokens[0] not in ROW_COMMANDS or not tokens[1].isdigit():
+        return tokens
+    row, rows = int(tokens[1]), cli.result_rows
+    if not rows:
+        raise ValueError("No listing to pick from yet; search or browse first.")
+    if not 1 <= row <= len(rows):
+        raise ValueError(f"No row {row}; the last listing has {len(rows)}.")
+    return [tokens[0], rows[row - 1].get("id", ""), *tokens[2:]]
+
+
+def save_options():
+    """The module-level switches as set by the options the shell was started with."""
+    return (cache.enabled, cache.refresh, profiler.enabled, thumbnails.enabled,
+            http_client.CONNECT_TIMEOUT, http_client.READ_TIMEOUT, cli.PROXY_URL, output.mode)
+
+
+def restore_options(options):
+    (cache.enabled, cache.refresh, profiler.enabled, thumbnails.enabled,
+     http_client.CONNECT_TIMEOUT, http_client.READ_TIMEOUT, cli.PROXY_URL, output.mode) = options
+
+
+def load_history():
+    """Turns on line editing and history where readline exists. Returns the history path or None."""
+    try:
+        import readline
+    except ImportError:
+        return None
+    path = os.path.join(cache.cache_root(), HISTORY_FILE)
+    try:
+        readline.read_history_file(path)
+    except OSError:
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+    return path
+
+
+def save_history(path):
+    if path is None:
+        return
+    import readline
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        readline.write_history_file(path)
+    except OSError:
+        pass
+
+
+def run_line(parser, defaults, options, line):
+    """Parses one line as CLI arguments on top of the startup options and runs it like main() would."""
+    console = cli.console
+    try:
+        args = parser.parse_args(defaults + resolve_rows(tokenize(line)))
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return
+    except SystemExit:
+        return  # argparse has already printed the problem
+    if args.shell:
+        console.print("[yellow]Already in the shell.[/yellow]")
+        return
+
+    restore_options(options)
+    cli.apply_options(args)
+    if args.profile:
+        profiler.reset()
+    start = time.perf_counter()
+    try:
+        cli.run_command(args)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Cancelled.[/yellow]")
+    except Exception as e:
+        console.print(f"[bold red]An unexpected error occurred:[/bold red] {e}")
+    console.print(f"[dim]{(time.perf_counter() - start) * 1000:.0f} ms[/dim]")
+    if args.verbose:
+        cli.display_network_stats()
+    if args.profile:
+        cli.display_profile(args.profile)
+
+
+def run_shell(parser, argv):
+    """
+    Reads commands until exit/quit or EOF, all in this process: API responses
+    stay in an in-memory LRU, HTTP connections stay pooled, and the last
+    listing's rows can be picked by number. Options given when the shell was
+    started apply to every command.
+    """
+    defaults = [arg for arg in argv if arg not in ("-sh", "-shell")]
+    options = save_options()
+    cache.keep_in_memory()
+    cli.result_rows = []
+    http_client.get_session()  # import requests now rather than on the first command
+    history = load_history()
+
+    cli.console.print(f"[bold yellow]pyanimecli v{cli.__version__} shell[/bold yellow] [dim]- commands as on the command line (s naruto, i 3, w 3 1 sub, h); exit or Ctrl-D to leave.[/dim]")
+    try:
+        while True:
+            try:
+                line = input(PROMPT).strip()
+            except KeyboardInterrupt:
+                cli.console.print()
+                continue
+            except EOFError:
+                cli.console.print()
+                break
+            if line in EXIT_WORDS:
+                break
+            if line:
+                run_line(parser, defaults, options, line)
+    finally:
+        save_history(history)
@@ -0,0 +1,126 @@
+import re, html, bisect, textwrap
+
+from .tui import encode_rows
+
+TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})")
+TAG = re.compile(r"<[^>]*>")
+MAX_LINES = 3  # rows of subtitle text at the bottom of the frame
+TEXT_STYLE = "\033[0;97;40m"  # bright white on black, readable over any frame
+
+
+def parse_timestamp(text):
+    match = TIMESTAMP.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"Bad timestamp: {text!r}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_vtt(text):
+    """
+    Parses WebVTT into (start, end, lines) cues in seconds. Cue settings,
+    styling tags and NOTE/STYLE/REGION blocks are dropped; malformed cues are
+    skipped.
+    """
+    cues = []
+    for block in re.split(r"\n\s*\n", text.lstrip("\ufeff").replace("\r\n", "\n")):
+        lines = block.strip("\n").split("\n")
+        timing = next((i for i, line in enumerate(lines[:2]) if "-->" in line), None)
+        if timing is None:
+            continue
+        start, _, rest = lines[timing].partition("-->")
+        try:
+            start, end = parse_timestamp(start), parse_timestamp(rest.split()[0] if rest.split() else "")
+        except ValueError:
+            continue
+        text_lines = [html.unescape(TAG.sub("", line)).strip() for line in lines[timing + 1:]]
+        text_lines = [line for line in text_lines if line]
+        if text_lines and end > start:
+            cues.append((start, end, text_lines))
+    return cues
+
+
+class SubtitleIndex:
+    """
+    Cues as a sorted interval index. The timeline is cut at every cue start and
+    end, and each piece holds the cues active during it (overlapping cues in
+    start order), so `segment_at` is one binary search however many cues there are.
+    """
+
+    def __init__(self, cues):
+        events = sorted({time for start, end, _ in cues for time in (start, end)})
+        ordered = sorted(cues, key=lambda cue: (cue[0], cue[1]))
+        self.boundaries = events
+        # segments[i] covers boundaries[i] to boundaries[i + 1].
+        self.segments = []
+        active, next_cue = [], 0
+        for time in events:
+            active = [cue for cue in active if cue[1] > time]
+            while next_cue < len(ordered) and ordered[next_cue][0] <= time:
+                if ordered[next_cue][1] > time:
+                    active.append(ordered[next_cue])
+                next_cue += 1
+            self.segments.append(tuple(line for cue in active for line in cue[2]))
+
+    def segment_at(self, time):
+        """Index of the piece of timeline containing `time`, or None outside every cue."""
+        index = bisect.bisect_right(self.boundaries, time) - 1
+        return index if index >= 0 and self.segments[index] else None
+
+    def lines_at(self, time):
+        index = self.segment_at(time)
+        return self.segments[index] if index is not None else ()
+
+
+class SubtitleOverlay:
+    """
+    Draws the active cues over the bottom rows of frames that have already been
+    encoded, as a few cursor moves and plain text after the frame's output.
+    Each piece of the timeline's text is formatted once. When the text changes,
+    the rows it covered are repainted from the frame's cell keys; nothing else
+    about the frame is encoded again.
+    """
+
+    def __init__(self, index, width, rows, mode="truecolor"):
+        self.index = index
+        self.width = width
+        self.rows = rows
+        self.mode = mode
+        self.drawn = {}  # segment -> (first covered row, escape string)
+        self.shown = None  # segment on screen
+        self.covered = ()  # cell rows the text on screen occupies
+
+    def _draw(self, segment):
+        drawn = self.drawn.get(segment)
+        if drawn is None:
+            lines = [part for line in self.index.segments[segment] for part in textwrap.wrap(line, self.width) or [""]]
+            lines = lines[-MAX_LINES:]
+            first = self.rows - len(lines)
+            parts = []
+            for offset, line in enumerate(lines):
+                column = (self.width - len(line)) // 2 + 1
+                # Cell row r is terminal line r + 2: frames start on the line after "\033[H".
+                parts.append(f"\033[{first + offset + 2};{column}H{TEXT_STYLE}{line}")
+            drawn = self.drawn[segment] = (first, "".join(parts) + "\033[0m")
+        return drawn
+
+    def update(self, time, keys, repainted):
+        """
+        Returns what to write after a frame whose cell keys are `keys` and whose
+        output was non-empty if `repainted`, for presentation time `time`.
+        """
+        segment = self.index.segment_at(time)
+        if segment == self.shown and not (segment is not None and repainted):
+            return ""
+        output = ""
+        if segment != self.shown and self.covered:
+            first = self.covered[0]
+            restored = encode_rows(keys[first:self.covered[-1] + 1], self.mode)
+            output = "".join(f"\033[{first + offset + 2};1H{row}" for offset, row in enumerate(restored)) + "\033[0m"
+            self.covered = ()
+        self.shown = segment
+        if segment is not None:
+            first, text = self._draw(segment)
+            self.covered = range(first, self.rows)
+            output += text
+        return output
@@ -0,0 +1,327 @@
+import os, sys, time, select, shutil, threading, unicodedata
+
+from . import profiler
+
+DEBOUNCE = 0.2  # seconds of no typing before a query is sent
+TICK = 0.03  # how often the prompt checks for keys and answers
+MIN_QUERY = 2  # shorter queries are not sent
+ROWS = 10  # suggestions shown at once
+PROMPT = "Search: "
+# The API's cap on suggestions per answer, on the low side. An answer shorter
+# than this holds every match, so narrower queries can be filtered from it
+# locally; a full one may have been cut off, so narrower queries are fetched.
+API_LIMIT = 5
+
+ARROWS = {"A": "up", "B": "down"}
+WINDOWS_ARROWS = {"H": "up", "P": "down"}
+
+
+def normalize(query):
+    return " ".join(query.lower().split())
+
+
+def matches(item, query):
+    """Whether every word of a normalized query appears in the suggestion's title or alias."""
+    text = f"{item.get('title') or ''} {(item.get('other_data') or {}).get('alias') or ''}".lower()
+    return all(word in text for word in query.split())
+
+
+class PrefixCache:
+    """
+    Answered queries in a trie keyed by the characters of the normalized query.
+    A query is answered from its longest answered prefix: exactly when that is
+    the query itself, by filtering when it is a shorter query whose answer was
+    complete, and provisionally (to show while the real answer is fetched)
+    when that answer may have been cut off.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.lock = threading.Lock()
+
+    def store(self, query, items, complete):
+        with self.lock:
+            node = self.root
+            for char in query:
+                node = node.setdefault(char, {})
+            node[None] = (items, complete)  # the None key holds a node's answer
+
+    def lookup(self, query):
+        """(items, authoritative) for a normalized query, or None when no prefix of it is answered."""
+        with self.lock:
+            node, best = self.root, (self.root.get(None), 0)
+            for depth, char in enumerate(query, 1):
+                node = node.get(char)
+                if node is None:
+                    break
+                if None in node:
+                    best = (node[None], depth)
+        answer, depth = best
+        if answer is None:
+            return None
+        items, complete = answer
+        if depth == len(query):
+            return items, True
+        return [item for item in items if matches(item, query)], complete
+
+
+class SuggestionFetcher:
+    """
+    Fetches on one background thread, always the latest query asked for: a
+    query superseded while it waits is dropped unsent, and one answered in the
+    meantime from a complete prefix is skipped. A request already in flight
+    runs to the end, and its answer goes into the cache, where it may still
+    answer the current query by filtering.
+    """
+
+    def __init__(self, fetch, cache):
+        self.fetch = fetch
+        self.cache = cache
+        self.wanted = None
+        self.in_flight = None
+        self.error = None
+        self.sent = 0  # requests actually made
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self, query):
+        with self.condition:
+            self.wanted = query
+            self.condition.notify()
+
+    def close(self):
+        """Ends the thread once any request in flight returns; queries not yet sent are dropped."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def busy(self, query):
+        with self.condition:
+            return query in (self.wanted, self.in_flight)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.wanted is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                query, self.wanted = self.wanted, None
+                hit = self.cache.lookup(query)
+                if hit is not None and hit[1]:
+                    continue
+                self.in_flight = query
+                self.sent += 1
+            try:
+                with profiler.span("suggest.fetch", "api", query=query):
+                    items, complete = self.fetch(query)
+                self.cache.store(query, items, complete)
+                error = None
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            with self.condition:
+                self.in_flight = None
+                self.error = error
+
+
+def api_fetcher(base_url):
+    """fetch(query) -> (items, complete) against search-suggestions/<query>."""
+    from urllib.parse import quote
+    from . import http_client
+
+    def fetch(query):
+        response = http_client.get(f"{base_url}/search-suggestions/{quote(query)}")
+        response.raise_for_status()
+        items = response.json() or []
+        return items, len(items) < API_LIMIT
+    return fetch
+
+
+def display_width(text):
+    return sum(2 if unicodedata.east_asian_width(char) in ("W", "F") else 1 for char in text)
+
+
+def fit(text, width):
+    """Cuts text to at most `width` terminal columns, so no line wraps and throws off the redraw."""
+    used = 0
+    for index, char in enumerate(text):
+        used += display_width(char)
+        if used > width:
+            return text[:index]
+    return text
+
+
+class RawTerminal:
+    """Keys as they are pressed, without echo: cbreak mode on POSIX, msvcrt on Windows. Restores the terminal on exit."""
+
+    def __enter__(self):
+        if os.name == "nt":
+            import msvcrt
+            self.msvcrt = msvcrt
+        else:
+            import termios, tty
+            self.fd = sys.stdin.fileno()
+            self.saved = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name != "nt":
+            import termios
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+
+    def read_keys(self, timeout):
+        """Keys pressed within `timeout` seconds: characters, or "up", "down", "enter", "backspace", "delete-word", "escape"."""
+        if os.name == "nt":
+            return self._read_windows(timeout)
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        return parse_keys(os.read(self.fd, 1024).decode(errors="ignore"))
+
+    def _read_windows(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.msvcrt.kbhit():
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(0.01)
+        keys = []
+        while self.msvcrt.kbhit():
+            char = self.msvcrt.getwch()
+            if char in ("\x00", "\xe0"):
+                key = WINDOWS_ARROWS.get(self.msvcrt.getwch())
+                if key:
+                    keys.append(key)
+            else:
+                keys.extend(parse_keys(char))
+        return keys
+
+
+def delete_word(query):
+    """Ctrl-W: drops the last word and the spaces after it."""
+    head, _, _ = query.rstrip().rpartition(" ")
+    return head + " " if head else ""
+
+
+def parse_keys(data):
+    keys, index = [], 0
+    while index < len(data):
+        char = data[index]
+        index += 1
+        if char == "\x1b":
+            if index < len(data) and data[index] in "[O":
+                # An escape sequence: skip parameters up to the final byte.
+                end = index + 1
+                while end < len(data) and not ("@" <= data[end] <= "~"):
+                    end += 1
+                if end < len(data) and data[end] in ARROWS:
+                    keys.append(ARROWS[data[end]])
+                index = end + 1
+            else:
+                keys.append("escape")
+        elif char in "\r\n":
+            keys.append("enter")
+        elif char in "\x7f\x08":
+            keys.append("backspace")
+        elif char == "\x17":
+            keys.append("delete-word")
+        elif char.isprintable():
+            keys.append(char)
+    return keys
+
+
+class SuggestionView:
+    """
+    The prompt line with the suggestions under it, redrawn in place: each
+    frame is one write that hides the cursor, overwrites the lines (clearing
+    only what is left of each), clears anything below and puts the cursor back
+    after the query. Unchanged frames are not written at all.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.frame = None
+
+    def render(self, query, items, selected, status):
+        width = max(20, shutil.get_terminal_size().columns - 1)
+        lines = [PROMPT + fit(query, width - len(PROMPT))]
+        for row, item in enumerate(items):
+            alias = (item.get("other_data") or {}).get("alias") or ""
+            text = fit(f"  {item.get('title') or 'N/A'}  {alias}  {item.get('id') or ''}", width)
+            lines.append(f"\033[7m{text}\033[0m" if row == selected else f"\033[1m{text}\033[0m")
+        lines.append(f"\033[2m{fit(status, width)}\033[0m")
+        frame = "\033[?25l\r" + "\033[K\n".join(lines) + "\033[K\033[J"
+        frame += f"\033[{len(lines) - 1}A\r\033[{display_width(lines[0])}C\033[?25h"
+        if frame != self.frame:
+            self.stream.write(frame)
+            self.stream.flush()
+            self.frame = frame
+
+    def clear(self):
+        if self.frame is not None:
+            self.stream.write("\r\033[J\033[?25h")
+            self.stream.flush()
+            self.frame = None
+
+
+def status_line(query, items, hit, fetcher, due):
+    if len(query) < MIN_QUERY:
+        return f"Type at least {MIN_QUERY} characters. Up/Down to pick, Enter to open, Esc to quit."
+    if due is not None or fetcher.busy(query):
+        return f"{len(items)} so far, searching..." if items else "Searching..."
+    if fetcher.error and hit is None:
+        return f"Error: {fetcher.error}"
+    return f"{len(items)} suggestion(s). Up/Down to pick, Enter to open, Esc to quit." if items else "No suggestions."
+
+
+def prompt(fetch):
+    """
+    Suggests as you type, with fetch(query) -> (items, complete) answering in
+    the background. A query is sent once typing pauses for DEBOUNCE seconds,
+    unless the prefix cache already answers it. Returns the suggestion picked
+    with Enter, or None on Escape.
+    """
+    cache = PrefixCache()
+    view = SuggestionView()
+    query, selected, due = "", 0, None
+    with RawTerminal() as terminal:
+        fetcher = SuggestionFetcher(fetch, cache)
+        try:
+            while True:
+                edited = False
+                for key in terminal.read_keys(TICK):
+                    if key == "escape":
+                        return None
+                    if key == "enter":
+                        hit = cache.lookup(normalize(query))
+                        items = hit[0][:ROWS] if hit else []
+                        if items:
+                            return items[min(selected, len(items) - 1)]
+                    elif key == "up":
+                        selected = max(0, selected - 1)
+                    elif key == "down":
+                        selected += 1
+                    elif key == "backspace":
+                        query, edited = query[:-1], True
+                    elif key == "delete-word":
+                        query, edited = delete_word(query), True
+                    elif len(key) == 1:
+                        query, edited = query + key, True
+
+                normalized = normalize(query)
+                hit = cache.lookup(normalized) if normalized else None
+                if edited:
+                    selected = 0
+                    needed = len(normalized) >= MIN_QUERY and not (hit and hit[1])
+                    due = time.monotonic() + DEBOUNCE if needed else None
+                if due is not None and time.monotonic() >= due:
+                    fetcher.request(normalized)
+                    due = None
+
+                items = hit[0][:ROWS] if hit and len(normalized) >= MIN_QUERY else []
+                selected = min(selected, max(0, len(items) - 1))
+                view.render(query, items, selected, status_line(normalized, items, hit, fetcher, due))
+        finally:
+            fetcher.close()
+            view.clear()
@@ -0,0 +1,102 @@
+import os, hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from . import cache, http_client, profiler
+
+THUMBNAIL_WORKERS = 8
+MAX_THUMBNAIL_BYTES = 64 * 1024 * 1024
+INFO_SIZE = (24, 18)   # columns, rows; covers are roughly 2:3 and a half-block cell holds two pixels
+RESULT_SIZE = (6, 4)
+
+enabled = False  # -thumbnails turns cover art on
+
+
+def thumbnail_dir():
+    return os.path.join(cache.cache_root(), "thumbnails")
+
+
+def _path(suffix, *parts):
+    key = "\0".join(map(str, parts))
+    return os.path.join(thumbnail_dir(), hashlib.sha1(key.encode()).hexdigest() + suffix)
+
+
+def _read(path):
+    if not cache.enabled or cache.refresh:
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # mtime doubles as the last-used time for LRU eviction
+        return data
+    except OSError:
+        return None
+
+
+def _write(path, data):
+    if not cache.enabled:
+        return
+    try:
+        cache.write_atomic(path, data)
+        cache.written(len(data), MAX_THUMBNAIL_BYTES, thumbnail_dir())
+    except OSError:
+        pass
+
+
+def fetch_image(url):
+    """Returns the image bytes at `url`, from the disk cache when possible."""
+    path = _path(".img", url)
+    data = _read(path)
+    if data is None:
+        with profiler.span("thumbnail.fetch", "download"):
+            response = http_client.get(url)
+            response.raise_for_status()
+            data = response.content
+        _write(path, data)
+    return data
+
+
+def render(url, width, rows):
+    """
+    Returns the cover at `url` as `rows` lines of half-block ANSI, `width` cells
+    wide, joined by newlines. The rendered text is cached per URL and cell size,
+    so a repeat view neither downloads nor decodes the image.
+    """
+    path = _path(".ansi", url, width, rows)
+    text = _read(path)
+    if text is not None:
+        return text.decode("utf-8")
+
+    import io
+    from PIL import Image
+    from .tui import render_block
+
+    data = fetch_image(url)
+    with profiler.span("thumbnail.render", "render"):
+        with Image.open(io.BytesIO(data)) as img:
+            frame = img.convert("RGB").resize((width, rows * 2))
+        text = "\n".join(render_block(frame))
+    _write(path, text.encode("utf-8"))
+    return text
+
+
+def render_many(urls, width, rows):
+    """
+    Renders covers concurrently and returns {url: text}. Covers that cannot be
+    fetched or decoded are left out. Raises ImportError without Pillow/numpy.
+    """
+    from importlib import import_module
+    for name in ("PIL.Image", "numpy"):
+        import_module(name)  # fail here if missing, not once per worker thread
+
+    def attempt(url):
+        try:
+            return render(url, width, rows)
+        except Exception:
+            return None
+
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(THUMBNAIL_WORKERS, len(urls))) as pool:
+        rendered = dict(zip(urls, pool.map(attempt, urls)))
+    return {url: text for url, text in rendered.items() if text is not None}
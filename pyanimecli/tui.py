@@ -1,13 +1,7 @@
-import os, time, shutil, sys
-from functools import lru_cache
-try:
-    from PIL import Image
-    import numpy as np
-except ImportError:
-    import subprocess as sp
-    res = sp.run([sys.executable, "-m", "pip", "install", "pillow", "numpy", "--trusted-host", "pypi.org", "--trusted-host", "files.pythonhosted.org"])
-    from PIL import Image
-    import numpy as np
+import os, time, shutil, sys, subprocess
+import numpy as np  # Pillow is only needed for images, so main() imports it
+
+from . import profiler
 
 def RGB_to_ANSI(fg_r, fg_g, fg_b, bg_r=None, bg_g=None, bg_b=None):
     """
@@ -20,35 +14,450 @@ def RGB_to_ANSI(fg_r, fg_g, fg_b, bg_r=None, bg_g=None, bg_b=None):
     bg_code = f"\033[48;2;{bg_r};{bg_g};{bg_b}m" if bg_r is not None else ""  # Set background (if provided)
     return fg_code + bg_code  # Combine codes
 
-@lru_cache(maxsize=None)
-def get_cached_ansi(fg_r, fg_g, fg_b, bg_r, bg_g, bg_b):
-    return RGB_to_ANSI(fg_r, fg_g, fg_b, bg_r, bg_g, bg_b)
+BLOCK = "▀"
+
+# "truecolor" sends 24-bit RGB codes; "256" and "16" send palette indices, which are
+# far shorter, after quantizing through a lookup table.
+COLOR_MODES = ("truecolor", "256", "16")
+
+# xterm's default 16-color palette. Terminal themes change these, so the 256-color
+# mode only uses the fixed cube and gray ramp (indices 16-255).
+ANSI16_PALETTE = np.array([
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+])
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+XTERM256_PALETTE = np.array(
+    [(r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS] + [(v, v, v) for v in range(8, 248, 10)]
+)
+# Per-channel weights for the nearest-color search; the eye is most sensitive to green.
+COLOR_WEIGHTS = np.array([3, 4, 2])
+
+# 4x4 Bayer matrix for ordered dithering, and how far (in 0-255 units) it may push a
+# channel in each mode, about one palette step.
+BAYER_4X4 = np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]])
+DITHER_SPREAD = {"256": 40, "16": 96}
+
+_luts = {}
+
+
+def detect_color_mode(environ=None):
+    """Picks a color mode from COLORTERM and TERM."""
+    environ = os.environ if environ is None else environ
+    colorterm = environ.get("COLORTERM", "").lower()
+    term = environ.get("TERM", "").lower()
+    if colorterm in ("truecolor", "24bit") or term.endswith("-direct") or environ.get("WT_SESSION"):
+        return "truecolor"
+    if "256color" in term:
+        return "256"
+    if not term:
+        return "truecolor" if sys.platform == "win32" else "16"
+    return "16"
+
+
+def palette_lut(mode):
+    """
+    Returns a 32x32x32 uint8 table mapping RGB with 5 bits per channel to the nearest
+    palette index for `mode`. Built once per process.
+    """
+    lut = _luts.get(mode)
+    if lut is None:
+        palette, first = (XTERM256_PALETTE, 16) if mode == "256" else (ANSI16_PALETTE, 0)
+        centers = np.arange(32) * 8 + 4
+        lut = np.empty((32, 32, 32), dtype=np.uint8)
+        g, b = np.meshgrid(centers, centers, indexing="ij")
+        for r_index, r in enumerate(centers):
+            distance = COLOR_WEIGHTS[0] * (r - palette[:, 0]) ** 2
+            distance = distance + COLOR_WEIGHTS[1] * (g[..., None] - palette[:, 1]) ** 2
+            distance += COLOR_WEIGHTS[2] * (b[..., None] - palette[:, 2]) ** 2
+            lut[r_index] = distance.argmin(axis=-1) + first
+        _luts[mode] = lut
+    return lut
+
+
+def quantize(data, mode, dither=False):
+    """
+    Maps a (rows, width, 3) RGB array to palette indices (rows, width) through
+    `palette_lut`. With `dither`, a Bayer threshold pattern is added first, which
+    trades longer color runs for smoother gradients.
+    """
+    pixels = data.astype(np.int16)
+    if dither:
+        rows, width = pixels.shape[:2]
+        threshold = ((BAYER_4X4 + 0.5) / 16 - 0.5) * DITHER_SPREAD[mode]
+        offsets = np.tile(threshold.astype(np.int16), (rows // 4 + 1, width // 4 + 1))[:rows, :width]
+        pixels = np.clip(pixels + offsets[..., None], 0, 255)
+    cells = ((pixels[..., 0] >> 3) << 10) | ((pixels[..., 1] >> 3) << 5) | (pixels[..., 2] >> 3)
+    return palette_lut(mode).ravel()[cells]
+
+
+def pack_cells(data, mode="truecolor", dither=False):
+    """
+    Packs a (height*2, width, 3) RGB array into one uint64 key per terminal cell.
+    Each key holds the top pixel in bits 24-47 and the bottom pixel in bits 0-23:
+    its 24-bit color in truecolor mode, otherwise its palette index.
+    """
+    rows = data.shape[0] // 2
+    if mode == "truecolor":
+        pixels = data[:rows * 2].astype(np.uint64)
+        values = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+    else:
+        values = quantize(data[:rows * 2], mode, dither).astype(np.uint64)
+    return (values[0::2] << 24) | values[1::2]
+
+
+# Decimal strings for each channel value, so color codes are built by array lookups.
+CHANNEL_SEP = np.array([f"{i};" for i in range(256)], dtype=object)
+CHANNEL_END = np.array([f"{i}m" for i in range(256)], dtype=object)
+# 16-color codes: 30-37/90-97 set the foreground, 40-47/100-107 the background.
+ANSI16_CODES = {
+    38: np.array([f"\033[{30 + i}m" for i in range(8)] + [f"\033[{90 + i}m" for i in range(8)], dtype=object),
+    48: np.array([f"\033[{40 + i}m" for i in range(8)] + [f"\033[{100 + i}m" for i in range(8)], dtype=object),
+}
 
 
-def render_frame(frame):
+def color_codes(colors, layer, mode="truecolor"):
+    """
+    Formats packed colors (24-bit, or palette indices outside truecolor mode) as
+    ANSI color codes in bulk. `layer` is 38 for foreground or 48 for background.
+    """
+    if mode == "256":
+        return f"\033[{layer};5;" + CHANNEL_END[colors.astype(np.intp)]
+    if mode == "16":
+        return ANSI16_CODES[layer][colors.astype(np.intp)]
+    r = ((colors >> 16) & 0xFF).astype(np.intp)
+    g = ((colors >> 8) & 0xFF).astype(np.intp)
+    b = (colors & 0xFF).astype(np.intp)
+    return f"\033[{layer};2;" + CHANNEL_SEP[r] + CHANNEL_SEP[g] + CHANNEL_END[b]
+
+
+def color_changes(keys):
+    """Marks cells whose color differs from the cell to their left (column 0 always counts)."""
+    changes = np.empty(keys.shape, dtype=bool)
+    changes[:, 0] = True
+    np.not_equal(keys[:, 1:], keys[:, :-1], out=changes[:, 1:])
+    return changes
+
+
+def encode_runs(run_keys, runs, width, mode="truecolor"):
+    """
+    Encodes color runs as a flat object array of "<fg code>", "<bg code>", "<blocks>"
+    triples, ready to be joined.
+    """
+    fg_colors, fg_index = np.unique(run_keys >> 24, return_inverse=True)
+    bg_colors, bg_index = np.unique(run_keys & 0xFFFFFF, return_inverse=True)
+    blocks = np.array([BLOCK * n for n in range(width + 1)], dtype=object)
+
+    parts = np.empty(len(run_keys) * 3, dtype=object)
+    parts[0::3] = color_codes(fg_colors, 38, mode)[fg_index]
+    parts[1::3] = color_codes(bg_colors, 48, mode)[bg_index]
+    parts[2::3] = blocks[runs]
+    return parts
+
+
+# Encoded length in bytes of each channel value, used to size output without building it.
+CHANNEL_DIGITS = np.array([len(str(i)) for i in range(256)], dtype=np.int64)
+
+
+def code_bytes(run_keys, mode="truecolor"):
+    """Total bytes of the fg+bg color codes `color_codes` emits for the given cell keys."""
+    if mode == "256":
+        # Two "\033[xx;5;" prefixes and two "m", plus the index digits.
+        digits = CHANNEL_DIGITS[(run_keys >> 24).astype(np.intp)].sum() + CHANNEL_DIGITS[(run_keys & 0xFF).astype(np.intp)].sum()
+        return len(run_keys) * 16 + int(digits)
+    if mode == "16":
+        # "\033[3Xm"/"\033[9Xm" and "\033[4Xm" are 5 bytes, "\033[10Xm" is 6.
+        return len(run_keys) * 10 + int(((run_keys & 0xFF) >= 8).sum())
+    total = len(run_keys) * 20  # two "\033[xx;2;" prefixes plus ";", ";" and "m" each
+    for shift in (40, 32, 24, 16, 8, 0):
+        total += int(CHANNEL_DIGITS[((run_keys >> shift) & 0xFF).astype(np.intp)].sum())
+    return total
+
+
+def encode_rows(keys, mode="truecolor"):
+    """
+    Encodes packed cell keys (rows, width) into one ANSI string per row.
+    A color code is only emitted where the cell differs from its left neighbour;
+    the rest of the run is plain half-block characters.
+    """
+    rows, width = keys.shape
+    if rows == 0 or width == 0:
+        return [""] * rows
+
+    changes = color_changes(keys)
+    starts = np.flatnonzero(changes)
+    runs = np.diff(starts, append=keys.size)
+    parts = encode_runs(keys.ravel()[starts], runs, width, mode).tolist()
+
+    bounds = (np.cumsum(changes.sum(axis=1)) * 3).tolist()
+    lines, begin = [], 0
+    for end in bounds:
+        lines.append("".join(parts[begin:end]))
+        begin = end
+    return lines
+
+
+def render_frame(frame, mode="truecolor", dither=False):
     if isinstance(frame, np.ndarray):
         data = frame
     else:
         data = np.array(frame, dtype=np.uint8)  # shape (height*2, width, 3)
-    top = data[0::2]         # every other row starting at 0
-    bottom = data[1::2]      # every other row starting at 1
     output_lines = ["\033[H"]
-    for top_row, bottom_row in zip(top, bottom):
-        line_chars = []
-        previous_ansi = None
-        for (r, g, b), (br, bg, bb) in zip(top_row, bottom_row):
-            ansi = get_cached_ansi(int(r), int(g), int(b), int(br), int(bg), int(bb))
-            if ansi == previous_ansi:
-                line_chars[-1]  += "▀"
-            else:
-                line_chars.append(ansi + "▀")
-                previous_ansi = ansi
-        output_lines.append("".join(line_chars))
+    output_lines.extend(encode_rows(pack_cells(data, mode, dither), mode))
     output_lines.append("\033[0m")
     return "\n".join(output_lines)
 
 
-def main(image_path=None, image=None):
+def render_block(frame, mode="truecolor", dither=False):
+    """
+    Renders a frame as one ANSI string per terminal row, without homing the
+    cursor, so it can be printed inline. Every row ends with a color reset.
+    """
+    data = frame if isinstance(frame, np.ndarray) else np.array(frame, dtype=np.uint8)
+    return [row + "\033[0m" for row in encode_rows(pack_cells(data, mode, dither), mode)]
+
+
+class FrameEncoder:
+    """
+    Stateful renderer that only repaints the cells that changed since the last frame.
+    The first frame, a resize, or a diff that would cost more bytes than a full frame
+    is sent as a full `render_frame` repaint. Byte counts are UTF-8 terminal bytes.
+    `mode` and `dither` are as for `render_frame`.
+    """
+
+    def __init__(self, mode="truecolor", dither=False):
+        self.mode = mode
+        self.dither = dither and mode != "truecolor"  # truecolor has no palette to dither into
+        self.previous = None
+        self.frames = 0
+        self.full_frames = 0
+        self.bytes_written = 0
+        self.bytes_saved = 0
+        self.last_saved = 0
+
+    def reset(self):
+        """Forgets the previous frame so the next one is a full repaint."""
+        self.previous = None
+
+    def pack(self, frame):
+        """`pack_cells` with this encoder's color mode."""
+        data = frame if isinstance(frame, np.ndarray) else np.array(frame, dtype=np.uint8)
+        return pack_cells(data, self.mode, self.dither)
+
+    def encode(self, frame):
+        return self.encode_keys(self.pack(frame))
+
+    def encode_keys(self, keys):
+        """Same as `encode`, for cell keys already packed with `pack`."""
+        rows, width = keys.shape
+        # "\033[H" + a newline per row + "\n\033[0m", plus codes and 3-byte blocks.
+        full_bytes = 3 + rows + 5 + code_bytes(keys[color_changes(keys)], self.mode) + 3 * keys.size
+
+        previous, self.previous = self.previous, keys
+        if previous is None or previous.shape != keys.shape:
+            return self._full(keys, full_bytes)
+
+        changed = keys != previous
+        # A repaint run starts at a changed cell whose left neighbour is unchanged,
+        # and a new color segment also starts wherever the color changes within a run.
+        run_starts = changed.copy()
+        run_starts[:, 1:] &= ~changed[:, :-1]
+        segment_starts = changed & (run_starts | color_changes(keys))
+
+        # render_frame puts a newline right after "\033[H", so cell row 0 is terminal line 2.
+        run_rows, run_cols = np.nonzero(run_starts)
+        move_bytes = 4 * len(run_rows) + self._digits(run_rows + 2) + self._digits(run_cols + 1)
+        delta_bytes = code_bytes(keys[segment_starts], self.mode) + 3 * int(changed.sum()) + move_bytes
+        if delta_bytes:
+            delta_bytes += 4  # trailing "\033[0m"
+        if delta_bytes >= full_bytes:
+            return self._full(keys, full_bytes)
+
+        self._count(delta_bytes, full_bytes)
+        if not delta_bytes:
+            return ""
+
+        # Segments end at the next segment start or the next unchanged cell.
+        starts = np.flatnonzero(segment_starts)
+        bounds = np.append(np.flatnonzero(segment_starts | ~changed), keys.size)
+        runs = bounds[np.searchsorted(bounds, starts) + 1] - starts
+
+        parts = encode_runs(keys.ravel()[starts], runs, width, self.mode).reshape(-1, 3)
+        moves = np.full(len(starts), "", dtype=object)
+        positions = np.array([str(i) for i in range(max(rows + 2, width + 1))], dtype=object)
+        moves[run_starts.ravel()[starts]] = "\033[" + positions[run_rows + 2] + ";" + positions[run_cols + 1] + "H"
+        return "".join(np.column_stack((moves, parts)).ravel().tolist()) + "\033[0m"
+
+    def _full(self, keys, full_bytes):
+        self.full_frames += 1
+        self._count(full_bytes, full_bytes)
+        return "\n".join(["\033[H", *encode_rows(keys, self.mode), "\033[0m"])
+
+    def _count(self, written, full_bytes):
+        self.frames += 1
+        self.bytes_written += written
+        self.last_saved = full_bytes - written
+        self.bytes_saved += self.last_saved
+
+    @staticmethod
+    def _digits(values):
+        return int((np.searchsorted([10, 100, 1000, 10000], values, side="right") + 1).sum())
+
+
+def stream_frames(source, width, height, fps, input_options=(), audio_fd=None):
+    """
+    Decodes `source` (a file path or URL) with ffmpeg, which also scales to
+    (width, height) and resamples to `fps`, and yields each frame as a
+    (height, width, 3) uint8 array as soon as it arrives on the pipe.
+    The same buffer is reused for every frame, so consume it before advancing.
+    `input_options` go before -i. With `audio_fd`, the write end of a pipe
+    (POSIX only), the same ffmpeg also copies the audio track into it as
+    Matroska, so an audio player reading the other end needs no download of its
+    own. The descriptor is closed here once ffmpeg has it.
+    """
+    cmd = [
+        "ffmpeg", "-loglevel", "error", "-nostdin", *input_options, "-i", source, "-an", "-sn",
+        "-vf", f"fps={fps},scale={width}:{height}",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1",
+    ]
+    if audio_fd is not None:
+        cmd += ["-map", "0:a:0", "-c:a", "copy", "-f", "matroska", f"pipe:{audio_fd}"]
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    view = memoryview(frame).cast("B")
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame.nbytes,
+            pass_fds=() if audio_fd is None else (audio_fd,),
+        )
+    finally:
+        if audio_fd is not None:
+            os.close(audio_fd)  # ffmpeg's copy is the only writer, so the reader sees it exit
+    try:
+        while True:
+            filled = 0
+            with profiler.span("ffmpeg.read", "subprocess"):
+                while filled < frame.nbytes:
+                    count = proc.stdout.readinto(view[filled:])
+                    if not count:
+                        return
+                    filled += count
+            yield frame
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+FRAME_CACHE_BYTES = 64 * 1024 * 1024  # rendered frames kept for looping animations
+DEFAULT_FRAME_DURATION = 0.1
+MAX_LAG = 0.25  # seconds behind schedule before the animation clock is reset
+
+
+class AnimationPlayer:
+    """
+    Loops an animated image in the terminal. Frames are decoded, resized and
+    encoded on demand, and each is shown for its own duration. Rendered frames are
+    kept for later loops until `cache_bytes` is used up. Playback is cyclic, so the
+    cache keeps the earliest frames instead of evicting; the rest of each loop is
+    decoded and encoded again. Memory therefore stays flat however long the image is.
+    """
+
+    def __init__(self, img, size, mode="truecolor", dither=False, workers=0, cache_bytes=FRAME_CACHE_BYTES):
+        self.img = img
+        self.size = size
+        self.encoder = FrameEncoder(mode, dither)
+        self.encoder_at = None  # index of the frame whose keys self.encoder holds
+        self.pool = None
+        if workers:
+            from .pool import RenderPool
+            self.pool = RenderPool(workers, mode, dither)
+        # Each cached output is a delta that assumes the previous frame is on screen.
+        self.cache = {}
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.cache_full = False
+        self.durations = {}
+        self.frame_count = None
+        self.deadline = None
+
+    def frames(self, start, stop=None):
+        """Yields (index, frame) from `start` up to `stop` or the last frame, decoding each on demand."""
+        index = start
+        while stop is None or index < stop:
+            try:
+                self.img.seek(index)
+            except EOFError:
+                self.frame_count = index
+                return
+            duration = self.img.info.get("duration") or 0
+            # Like browsers, treat near-zero GIF delays as the 100 ms default.
+            self.durations[index] = duration / 1000 if duration >= 20 else DEFAULT_FRAME_DURATION
+            yield index, np.asarray(self.img.convert("RGB").resize(self.size))
+            index += 1
+
+    def _render(self, start, stop, previous):
+        """Encodes frames from `start` as deltas against frame `previous`, yielding (index, output)."""
+        if self.encoder_at != previous:
+            self.encoder.reset()
+        if self.pool is None or stop is not None:
+            for index, frame in self.frames(start, stop):
+                output = self.encoder.encode(frame)
+                self.encoder_at = index
+                yield index, output
+            return
+        last = None
+        for index, frame, output, _ in self.pool.encode(self.frames(start)):
+            last = index, frame.copy()  # the pool's frame buffer is reused
+            yield index, output
+        if last:
+            self.encoder_at = last[0]
+            self.encoder.previous = self.encoder.pack(last[1])
+
+    def _store(self, index, output):
+        size = sys.getsizeof(output)
+        if self.cache_full or self.cached_bytes + size > self.cache_bytes:
+            self.cache_full = True
+            return
+        self.cache[index] = output
+        self.cached_bytes += size
+
+    def _present(self, index, output):
+        sys.stdout.write(output)
+        sys.stdout.flush()
+        self.deadline += self.durations[index]
+        delay = self.deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -MAX_LAG:
+            self.deadline = time.monotonic()  # a slow terminal fell behind; don't rush to catch up
+
+    def play(self, loops=None):
+        """Plays `loops` times, or until interrupted when None."""
+        self.deadline = time.monotonic()
+        loop = 0
+        try:
+            while loops is None or loop < loops:
+                index = 0
+                while self.frame_count is None or index < self.frame_count:
+                    if index in self.cache:
+                        self._present(index, self.cache[index])
+                        index += 1
+                        continue
+                    stop = next((i for i in sorted(self.cache) if i > index), None)
+                    previous = index - 1 if index else (self.frame_count - 1 if loop else None)
+                    for index, output in self._render(index, stop, previous):
+                        if index or loop:  # the first frame of the first loop is a full repaint
+                            self._store(index, output)
+                        self._present(index, output)
+                    index += 1
+                loop += 1
+        finally:
+            if self.pool:
+                self.pool.close()
+
+
+def main(image_path=None, image=None, workers=0, mode="truecolor", dither=False):
+    from PIL import Image
+
     img = image or Image.open(image_path)
 
     ANIMATED = False
@@ -61,30 +470,14 @@ def main(image_path=None, image=None):
     size = (width, height * 2)
 
     if ANIMATED:
-        frames = []
-        while True:
-            try:
-                frames.append(img.copy())
-                img.seek(img.tell() + 1)
-            except EOFError:
-                break
-        
-        frames = [frame.resize(size).convert("RGB") for frame in frames]
-        rendered_frames = [render_frame(frame) for frame in frames]
-
-        while True:
-            for frame in rendered_frames:
-                sys.stdout.write(frame)
-                sys.stdout.flush()
-                # time.sleep(frame.info['duration'] / 1000)
-                # Removed to improve performance (terminal write delay already provides a significant delay between frames)
+        AnimationPlayer(img, size, mode, dither, workers).play()
     else:
         frame = img.resize(size).convert("RGB")
-        sys.stdout.write(render_frame(frame))
+        sys.stdout.write(render_frame(frame, mode, dither))
         sys.stdout.flush()
 
 
 if __name__ == "__main__":
     # IMAGE_NAME = "OIP.jfif"
     IMAGE_NAME = "rickroll.gif"
-    main(os.path.join(os.path.dirname(__file__), IMAGE_NAME))
\ No newline at end of file
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), IMAGE_NAME))
@@ -0,0 +1,35 @@
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import pytest
+from stub_server import StubConfig, start
+
+from pyanimecli import cache, pyanimecli as cli
+
+ANIME_ID = "blade-of-the-northern-sky-1000"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, url = start(config=StubConfig(segments=2, segment_duration=0.1))
+    monkeypatch.setattr(cli, "BASE_URL", url)
+    monkeypatch.setattr(cli, "PROXY_URL", f"{url}/cors?url=")
+    monkeypatch.setattr(cache, "enabled", False)
+    yield url
+    server.shutdown()
+
+
+def test_subtitle_failure_is_reported_per_episode(stub, tmp_path, monkeypatch):
+    data = cli.make_request(f"info/{ANIME_ID}", quiet=True)
+    title = cli.sanitize_filename(data["title"])
+    # A directory where episode 1's subtitles go makes writing them fail.
+    os.makedirs(tmp_path / f"{title}-Episode-01-[sub].vtt")
+    summaries = []
+    monkeypatch.setattr(cli, "display_download_summary", summaries.append)
+
+    cli.download_episode_range(data, [1, 2], "sub", str(tmp_path))
+
+    (first, second), = summaries
+    assert first[4].startswith("subtitles failed:") and first[2] > 0
+    assert second[4] == "ok"
@@ -0,0 +1,58 @@
+import os, sys, threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import pytest
+from stub_server import StubConfig, start
+
+from pyanimecli import hls
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server, url = start(config=StubConfig(segments=4, segment_duration=0.1))
+    yield url
+    server.shutdown()
+
+
+def downloader(base_url, height, output_path, token="a"):
+    # The query stands in for the expiring token real stream URLs carry.
+    playlist = hls.Playlist(f"{base_url}/hls/{height}p/index.m3u8?token={token}")
+    return hls.SegmentDownloader(playlist, output_path)
+
+
+def interrupt(segment_downloader, keep):
+    """Downloads every segment, then forgets all but the first `keep`, as if the run had been cut short."""
+    segment_downloader.download()
+    with open(segment_downloader.journal_path, "w", encoding="utf-8") as f:
+        f.write("".join(f"{index}\n" for index in range(keep)))
+
+
+def test_resume_same_variant_keeps_segments(base_url, tmp_path):
+    output_path = str(tmp_path / "episode.ts")
+    interrupt(downloader(base_url, 720, output_path), keep=3)
+    assert downloader(base_url, 720, output_path, token="b").download() == 1
+
+
+def test_resume_different_variant_starts_over(base_url, tmp_path):
+    output_path = str(tmp_path / "episode.ts")
+    interrupt(downloader(base_url, 720, output_path), keep=3)
+    resumed = downloader(base_url, 360, output_path)
+    assert resumed.download() == 4
+    resumed.assemble()
+    with open(output_path, "rb") as f:
+        assert len(f.read()) == 4 * len(hls.http_client.get(f"{base_url}/hls/360p/seg_0000.ts").content)
+
+
+def test_stopped_prefetch_keeps_finished_segments(base_url, tmp_path):
+    playlist = hls.Playlist(f"{base_url}/hls/720p/index.m3u8")
+    segment_size = len(hls.http_client.get(f"{base_url}/hls/720p/seg_0000.ts").content)
+    stop = threading.Event()
+    # At one segment per second, the first has arrived and the second is cut off.
+    threading.Timer(1.5, stop.set).start()
+    path = hls.prefetch(playlist, str(tmp_path), 4, max_rate=segment_size, stop=stop)
+    with open(path, encoding="utf-8") as f:
+        sources = [line for line in f.read().splitlines() if line and not line.startswith("#")]
+    assert sources[0] == str(tmp_path / "segment_00000.ts")
+    assert all(source.startswith(base_url) for source in sources[1:])
+    assert sorted(os.listdir(tmp_path)) == ["prefetched.m3u8", "segment_00000.ts"]
@@ -0,0 +1,29 @@
+from pyanimecli import local_proxy
+from pyanimecli.local_proxy import LocalProxy, PATH_PREFIX, cache_key, rewrite_playlist, upstream_url
+
+SEGMENT = "https://cdn.example.com/v/seg-1.ts"
+
+
+def test_cache_key_drops_only_token_parameters():
+    assert cache_key(f"{SEGMENT}?token=a&expires=1") == cache_key(f"{SEGMENT}?token=b&expires=2") == SEGMENT
+    assert cache_key("https://cdn.example.com/get?file=1&token=a") == "https://cdn.example.com/get?file=1"
+    assert cache_key(f"{SEGMENT}?n=1") != cache_key(f"{SEGMENT}?n=2")
+
+
+def test_cache_path_keeps_resources_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_proxy, "segment_dir", lambda: str(tmp_path))
+    proxy = LocalProxy(("127.0.0.1", 0))
+    try:
+        assert proxy.cache_path(f"{SEGMENT}?n=1&token=a") == proxy.cache_path(f"{SEGMENT}?n=1&token=b")
+        assert proxy.cache_path(f"{SEGMENT}?n=1") != proxy.cache_path(f"{SEGMENT}?n=2")
+    finally:
+        proxy.server_close()
+
+
+def test_upstream_url_is_decoded_once():
+    url = f"{SEGMENT}?token=a%2Bb%3D&n=1"
+    # With the bare path as the prefix, a rewritten line is the request path the proxy receives.
+    rewritten = rewrite_playlist(f"#EXTM3U\n#EXTINF:4,\n{url}\n", SEGMENT, PATH_PREFIX).splitlines()[-1]
+    assert upstream_url(rewritten) == url
+    assert upstream_url(PATH_PREFIX + url) == url
+    assert upstream_url("/elsewhere") == upstream_url(PATH_PREFIX + "file:///etc/passwd") == ""
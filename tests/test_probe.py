@@ -0,0 +1,26 @@
+import os, sys, subprocess, textwrap, time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Two sources on a server that accepts connections and never answers.
+SCRIPT = textwrap.dedent("""
+    import socket, threading
+    from pyanimecli import cache, probe
+    cache.enabled = False
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    held = []
+    threading.Thread(target=lambda: [held.append(server.accept()) for _ in iter(int, 1)], daemon=True).start()
+    port = server.getsockname()[1]
+    sources = [{"url": f"http://127.0.0.1:{port}/a.m3u8"}, {"url": f"http://localhost:{port}/b.m3u8"}]
+    print(probe.pick_source({"sources": sources}, "best"))
+""")
+
+
+def test_dead_sources_do_not_hold_up_exit():
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("/a.m3u8")
+    assert time.monotonic() - start < 15